@@ -0,0 +1,13 @@
+-- Add the query indexes to an existing drone_monitoring_db
+-- (db.create_all() only creates them for new tables)
+-- CONCURRENTLY avoids locking the tables against inserts while the indexes build,
+-- so run this outside a transaction: psql -d drone_monitoring_db -f add_indexes.sql
+
+-- Latest sensor readings: ORDER BY timestamp DESC LIMIT n
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sensor_readings_timestamp ON sensor_readings (timestamp);
+
+-- Flight data: positions of a flight
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_pos_flight_ts ON drone_positions (flight_id, timestamp);
+
+-- Flight data: readings of each position
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_sr_pos_ts ON sensor_readings (drone_position_id, timestamp);
@@ -1,21 +1,202 @@
 import os
 import sys
 from datetime import datetime, UTC
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, current_app
 from flask_cors import CORS
+from sqlalchemy import insert, literal, select, text
 import subprocess
+import threading
 import json
+from collections import defaultdict
+import msgspec
+import psycopg
 
 # Add the project root to Python path for direct script execution
 sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 
 # Use relative imports when running as a package, fallback to absolute when running directly
 try:
-    from .models import db, Flight, DronePosition, SensorReading
-    from .config import Config
+    from .models import db, Flight, DronePosition, SensorReading, NEW_READING_CHANNEL
+    from .config import Config, engine_options
+    from .cache import cache, flight_data_key, FLIGHTS_KEY, OPEN_FLIGHT_TTL, CLOSED_FLIGHT_TTL
+    from .json_provider import OrjsonProvider
+    from .schemas import log_data_decoder, log_data_batch_decoder
+    from .ingest import enqueue_samples
 except ImportError:
-    from backend.models import db, Flight, DronePosition, SensorReading
-    from backend.config import Config
+    from backend.models import db, Flight, DronePosition, SensorReading, NEW_READING_CHANNEL
+    from backend.config import Config, engine_options
+    from backend.cache import cache, flight_data_key, FLIGHTS_KEY, OPEN_FLIGHT_TTL, CLOSED_FLIGHT_TTL
+    from backend.json_provider import OrjsonProvider
+    from backend.schemas import log_data_decoder, log_data_batch_decoder
+    from backend.ingest import enqueue_samples
+
+def latest_reading_entry(reading_id, timestamp, latitude, longitude, altitude,
+                         temperature, humidity, air_quality_index, is_anomaly):
+    """Build the item returned by the latest sensor readings endpoint.
+    
+    Args:
+        reading_id: ID of the sensor reading
+        timestamp: Timestamp of the sensor reading
+        latitude: Latitude of the drone position
+        longitude: Longitude of the drone position
+        altitude: Altitude of the drone position
+        temperature: Temperature reading
+        humidity: Humidity reading
+        air_quality_index: Air quality index reading
+        is_anomaly: Whether the reading was flagged as an anomaly
+        
+    Returns:
+        dict: Serializable representation of the reading
+    """
+    return {
+        'id': reading_id,
+        'timestamp': timestamp,
+        'position': {
+            'latitude': latitude,
+            'longitude': longitude,
+            'altitude': altitude
+        },
+        'temperature': temperature,
+        'humidity': humidity,
+        'air_quality_index': air_quality_index,
+        'is_anomaly': is_anomaly
+    }
+
+def insert_position_with_reading(position_values, reading_values):
+    """Insert a drone position and its sensor reading.
+    
+    On PostgreSQL both rows are written by a single statement, using a
+    data-modifying CTE for the position insert. Other dialects fall back to
+    two INSERT ... RETURNING statements.
+    
+    Args:
+        position_values: Column values for the DronePosition row
+        reading_values: Column values for the SensorReading row, without
+            drone_position_id
+        
+    Returns:
+        tuple: (position_id, reading_id, is_anomaly)
+    """
+    if db.engine.dialect.name == 'postgresql':
+        new_position = insert(DronePosition).values(**position_values).returning(DronePosition.id).cte('new_position')
+        columns = SensorReading.__table__.c
+        stmt = insert(SensorReading).from_select(
+            ['drone_position_id', *reading_values],
+            select(new_position.c.id, *[literal(value, columns[key].type) for key, value in reading_values.items()])
+        ).returning(SensorReading.drone_position_id, SensorReading.id, SensorReading.is_anomaly)
+        return tuple(db.session.execute(stmt).one())
+    
+    position_id = db.session.execute(
+        insert(DronePosition).values(**position_values).returning(DronePosition.id)
+    ).scalar_one()
+    reading_id, is_anomaly = db.session.execute(
+        insert(SensorReading).values(drone_position_id=position_id, **reading_values).returning(SensorReading.id, SensorReading.is_anomaly)
+    ).one()
+    return position_id, reading_id, is_anomaly
+
+def insert_sensor_readings(readings):
+    """Insert many sensor readings, keeping their order.
+    
+    With the psycopg driver the rows are streamed with COPY FROM STDIN, which
+    skips per-row statement parsing. COPY cannot return values, so IDs are
+    reserved from the sequence up front and the generated is_anomaly flags are
+    read back afterwards. Other drivers use an executemany INSERT ... RETURNING.
+    
+    Args:
+        readings: List of column values for each SensorReading row
+        
+    Returns:
+        list: (reading_id, is_anomaly) tuples in the same order as readings
+    """
+    if db.engine.dialect.driver == 'psycopg':
+        ids = db.session.scalars(
+            text("SELECT nextval(pg_get_serial_sequence('sensor_readings', 'id')) FROM generate_series(1, :n)"),
+            {'n': len(readings)}
+        ).all()
+        columns = ['drone_position_id', 'timestamp', 'temperature', 'humidity', 'air_quality_index']
+        
+        # COPY on the session's own connection so it shares the transaction
+        driver_connection = db.session.connection().connection.driver_connection
+        with driver_connection.cursor() as cursor:
+            with cursor.copy(f"COPY sensor_readings (id, {', '.join(columns)}) FROM STDIN") as copy:
+                for reading_id, reading in zip(ids, readings):
+                    copy.write_row((reading_id, *[reading[column] for column in columns]))
+        
+        anomalies = dict(db.session.execute(
+            select(SensorReading.id, SensorReading.is_anomaly).where(SensorReading.id.in_(ids))
+        ).all())
+        return [(reading_id, anomalies[reading_id]) for reading_id in ids]
+    
+    return db.session.execute(
+        insert(SensorReading).returning(SensorReading.id, SensorReading.is_anomaly, sort_by_parameter_order=True),
+        readings
+    ).all()
+
+def insert_samples(flight_id, samples):
+    """Insert the positions and sensor readings for a list of samples.
+    
+    Args:
+        flight_id: ID of the flight the samples belong to
+        samples: List of decoded LogData samples
+        
+    Returns:
+        list: (position_id, reading_id, is_anomaly, timestamp) tuples in the
+            same order as samples
+    """
+    now = datetime.now(UTC)
+    timestamps = [s.timestamp or now for s in samples]
+    
+    # Insert all positions with one executemany, keeping the returned IDs
+    # in the same order as the samples
+    position_ids = db.session.scalars(
+        insert(DronePosition).returning(DronePosition.id, sort_by_parameter_order=True),
+        [
+            {
+                'flight_id': flight_id,
+                'timestamp': ts,
+                'latitude': s.latitude,
+                'longitude': s.longitude,
+                'altitude': s.altitude
+            } for s, ts in zip(samples, timestamps)
+        ]
+    ).all()
+    
+    # is_anomaly is generated by the database and returned with each ID
+    readings = insert_sensor_readings([
+        {
+            'drone_position_id': position_id,
+            'timestamp': ts,
+            'temperature': s.temperature,
+            'humidity': s.humidity,
+            'air_quality_index': s.air_quality_index
+        } for s, ts, position_id in zip(samples, timestamps, position_ids)
+    ])
+    return [
+        (position_id, reading_id, is_anomaly, ts)
+        for position_id, (reading_id, is_anomaly), ts in zip(position_ids, readings, timestamps)
+    ]
+
+def cache_latest_readings(rows):
+    """Push newly inserted readings onto the cached latest readings set.
+    
+    Args:
+        rows: Iterable of (reading_id, timestamp, sample, is_anomaly) tuples,
+            where sample is the decoded LogData
+    """
+    cache.add_latest_readings({
+        current_app.json.dumps(latest_reading_entry(
+            reading_id,
+            timestamp,
+            sample.latitude,
+            sample.longitude,
+            sample.altitude,
+            sample.temperature,
+            sample.humidity,
+            sample.air_quality_index,
+            is_anomaly
+        )): timestamp.timestamp()
+        for reading_id, timestamp, sample, is_anomaly in rows
+    })
 
 def create_app(test_config=None):
     """Create and configure the Flask application.
@@ -28,6 +209,7 @@ def create_app(test_config=None):
     """
     # Create and configure the app
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     
     # Load the default configuration
     app.config.from_object(Config)
@@ -36,12 +218,32 @@ def create_app(test_config=None):
     if test_config:
         app.config.update(test_config)
     
+    # Pick engine options for each database by its own dialect, so a SQLite
+    # primary or reader never receives the PostgreSQL pool arguments
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: bind if isinstance(bind, dict) else {'url': bind, **engine_options(bind)}
+        for key, bind in app.config.get('SQLALCHEMY_BINDS', {}).items()
+    }
+    
     # Enable CORS
     CORS(app)
     
     # Initialize the database
     db.init_app(app)
     
+    # Initialize the response cache (no-op unless REDIS_URL is configured)
+    cache.init_app(app)
+    
+    # Slots for open sensor reading streams (see MAX_SSE_STREAMS)
+    stream_slots = threading.BoundedSemaphore(app.config['MAX_SSE_STREAMS'])
+    
+    @app.cli.command('init-db')
+    def init_db():
+        """Create the database tables."""
+        db.create_all()
+        print("Database tables created.")
+    
     # Register routes
     
     @app.route('/')
@@ -54,53 +256,91 @@ def create_app(test_config=None):
         new_flight = Flight(start_time=datetime.now(UTC))
         db.session.add(new_flight)
         db.session.commit()
+        cache.delete(FLIGHTS_KEY)
         return jsonify({'flight_id': new_flight.id, 'start_time': new_flight.start_time}), 201
     
     # API Endpoint: Log drone position and sensor data
     @app.route('/api/flights/<int:flight_id>/log_data', methods=['POST'])
     def log_flight_data(flight_id):
-        data = request.json
+        try:
+            data = log_data_decoder.decode(request.get_data(cache=False))
+        except msgspec.DecodeError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Find the flight
         flight = db.session.get(Flight, flight_id)
         if not flight:
             return jsonify({'error': 'Flight not found'}), 404
         
-        # Create drone position
-        position = DronePosition(
-            flight_id=flight_id,
-            timestamp=datetime.fromisoformat(data['timestamp']) if 'timestamp' in data else datetime.now(UTC),
-            latitude=data['latitude'],
-            longitude=data['longitude'],
-            altitude=data['altitude']
-        )
-        
-        db.session.add(position)
-        db.session.flush()  # Get ID before commit
-        
-        # Create sensor reading
-        # Check for anomalies - simple threshold-based detection
-        is_anomaly = False
-        if data['temperature'] > 30 or data['temperature'] < 0 or data['humidity'] > 90 or data['air_quality_index'] > 150:
-            is_anomaly = True
-            
-        reading = SensorReading(
-            drone_position_id=position.id,
-            timestamp=datetime.fromisoformat(data['timestamp']) if 'timestamp' in data else datetime.now(UTC),
-            temperature=data['temperature'],
-            humidity=data['humidity'],
-            air_quality_index=data['air_quality_index'],
-            is_anomaly=is_anomaly
-        )
-        
-        db.session.add(reading)
+        # Hand the sample to the ingest worker when asynchronous ingest is on
+        if app.config.get('ASYNC_INGEST') and enqueue_samples(flight_id, [data]):
+            return jsonify({'status': 'queued'}), 202
+        
+        # Create drone position and sensor reading
+        # The position and reading share the timestamp
+        timestamp = data.timestamp or datetime.now(UTC)
+        position_values = {
+            'flight_id': flight_id,
+            'timestamp': timestamp,
+            'latitude': data.latitude,
+            'longitude': data.longitude,
+            'altitude': data.altitude
+        }
+        reading_values = {
+            'timestamp': timestamp,
+            'temperature': data.temperature,
+            'humidity': data.humidity,
+            'air_quality_index': data.air_quality_index
+        }
+        # The database flags anomalies through the generated is_anomaly column
+        position_id, reading_id, is_anomaly = insert_position_with_reading(position_values, reading_values)
         db.session.commit()
+        cache.delete(flight_data_key(flight_id))
+        cache_latest_readings([(reading_id, timestamp, data, is_anomaly)])
         
+        # The verdict is repeated in a header so clients can skip decoding the body
         return jsonify({
-            'position_id': position.id,
-            'reading_id': reading.id,
+            'position_id': position_id,
+            'reading_id': reading_id,
             'is_anomaly': is_anomaly
-        }), 201
+        }), 201, {'X-Anomaly': '1' if is_anomaly else '0'}
+    
+    # API Endpoint: Log a batch of drone positions and sensor data
+    @app.route('/api/flights/<int:flight_id>/log_data/batch', methods=['POST'])
+    def log_flight_data_batch(flight_id):
+        try:
+            samples = log_data_batch_decoder.decode(request.get_data(cache=False)).samples
+        except msgspec.DecodeError as e:
+            return jsonify({'error': str(e)}), 400
+        if not samples:
+            return jsonify({'error': 'No samples provided'}), 400
+        
+        # Find the flight
+        flight = db.session.get(Flight, flight_id)
+        if not flight:
+            return jsonify({'error': 'Flight not found'}), 404
+        
+        # Hand the samples to the ingest worker when asynchronous ingest is on
+        if app.config.get('ASYNC_INGEST') and enqueue_samples(flight_id, samples):
+            return jsonify({'status': 'queued', 'count': len(samples)}), 202
+        
+        results = insert_samples(flight_id, samples)
+        db.session.commit()
+        cache.delete(flight_data_key(flight_id))
+        cache_latest_readings([
+            (reading_id, ts, s, is_anomaly)
+            for (_, reading_id, is_anomaly, ts), s in zip(results, samples)
+        ])
+        
+        return jsonify({
+            'results': [
+                {
+                    'position_id': position_id,
+                    'reading_id': reading_id,
+                    'is_anomaly': is_anomaly
+                } for position_id, reading_id, is_anomaly, _ in results
+            ]
+        }), 201, {'X-Anomaly-Count': str(sum(1 for _, _, is_anomaly, _ in results if is_anomaly))}
     
     # API Endpoint: End a flight
     @app.route('/api/flights/<int:flight_id>/end', methods=['POST'])
@@ -111,13 +351,18 @@ def create_app(test_config=None):
         
         flight.end_time = datetime.now(UTC)
         db.session.commit()
+        cache.delete(flight_data_key(flight_id), FLIGHTS_KEY)
         
         return jsonify({'flight_id': flight.id, 'end_time': flight.end_time}), 200
     
     # API Endpoint: Get all flights
     @app.route('/api/flights', methods=['GET'])
     def get_all_flights():
-        flights = Flight.query.all()
+        cached = cache.get(FLIGHTS_KEY)
+        if cached is not None:
+            return app.response_class(cached, status=200, mimetype='application/json')
+        
+        flights = db.session.execute(select(Flight.id, Flight.start_time, Flight.end_time)).all()
         flights_data = [
             {
                 'id': flight.id,
@@ -126,40 +371,68 @@ def create_app(test_config=None):
             } for flight in flights
         ]
         
-        return jsonify(flights_data), 200
+        response = jsonify(flights_data)
+        cache.set(FLIGHTS_KEY, response.get_data(), ex=60)
+        return response, 200
     
     # API Endpoint: Get flight data
     @app.route('/api/flights/<int:flight_id>/data', methods=['GET'])
     def get_flight_data(flight_id):
-        flight = db.session.get(Flight, flight_id)
+        key = flight_data_key(flight_id)
+        cached = cache.get(key)
+        if cached is not None:
+            return app.response_class(cached, status=200, mimetype='application/json')
+        
+        # Fetch plain column tuples instead of ORM objects: the flight, then
+        # all of its positions, then all of its readings in one query each
+        flight = db.session.execute(
+            select(Flight.id, Flight.start_time, Flight.end_time).where(Flight.id == flight_id)
+        ).one_or_none()
         if not flight:
             return jsonify({'error': 'Flight not found'}), 404
         
-        positions = DronePosition.query.filter_by(flight_id=flight_id).all()
-        positions_data = []
+        positions = db.session.execute(
+            select(
+                DronePosition.id,
+                DronePosition.timestamp,
+                DronePosition.latitude,
+                DronePosition.longitude,
+                DronePosition.altitude
+            ).where(DronePosition.flight_id == flight_id).order_by(DronePosition.id)
+        ).all()
+        readings = db.session.execute(
+            select(
+                SensorReading.drone_position_id,
+                SensorReading.id,
+                SensorReading.timestamp,
+                SensorReading.temperature,
+                SensorReading.humidity,
+                SensorReading.air_quality_index,
+                SensorReading.is_anomaly
+            ).join(DronePosition).where(DronePosition.flight_id == flight_id).order_by(SensorReading.id)
+        ).all()
         
-        for position in positions:
-            readings = SensorReading.query.filter_by(drone_position_id=position.id).all()
-            
-            readings_data = [
-                {
-                    'id': reading.id,
-                    'timestamp': reading.timestamp,
-                    'temperature': reading.temperature,
-                    'humidity': reading.humidity,
-                    'air_quality_index': reading.air_quality_index,
-                    'is_anomaly': reading.is_anomaly
-                } for reading in readings
-            ]
-            
-            positions_data.append({
+        readings_by_position = defaultdict(list)
+        for reading in readings:
+            readings_by_position[reading.drone_position_id].append({
+                'id': reading.id,
+                'timestamp': reading.timestamp,
+                'temperature': reading.temperature,
+                'humidity': reading.humidity,
+                'air_quality_index': reading.air_quality_index,
+                'is_anomaly': reading.is_anomaly
+            })
+        
+        positions_data = [
+            {
                 'id': position.id,
                 'timestamp': position.timestamp,
                 'latitude': position.latitude,
                 'longitude': position.longitude,
                 'altitude': position.altitude,
-                'sensor_readings': readings_data
-            })
+                'sensor_readings': readings_by_position[position.id]
+            } for position in positions
+        ]
         
         flight_data = {
             'id': flight.id,
@@ -168,34 +441,77 @@ def create_app(test_config=None):
             'positions': positions_data
         }
         
-        return jsonify(flight_data), 200
+        # Closed flights can be kept longer, but still expire: with async
+        # ingest, a response built just before the worker committed queued
+        # samples could otherwise be stored after its invalidation and stay
+        response = jsonify(flight_data)
+        cache.set(key, response.get_data(), ex=CLOSED_FLIGHT_TTL if flight.end_time else OPEN_FLIGHT_TTL)
+        return response, 200
     
     # API Endpoint: Get latest sensor readings
     @app.route('/api/sensor_readings/latest', methods=['GET'])
     def get_latest_sensor_readings():
         limit = request.args.get('limit', 10, type=int)
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
         
-        readings = SensorReading.query.join(DronePosition).order_by(SensorReading.timestamp.desc()).limit(limit).all()
-        readings_data = []
+        # Serve from the cached sorted set when it holds enough readings
+        cached = cache.get_latest_readings(limit)
+        if cached is not None:
+            return app.response_class(b'[' + b','.join(cached) + b']', status=200, mimetype='application/json')
         
-        for reading in readings:
-            position = reading.position
-            readings_data.append({
-                'id': reading.id,
-                'timestamp': reading.timestamp,
-                'position': {
-                    'latitude': position.latitude,
-                    'longitude': position.longitude,
-                    'altitude': position.altitude
-                },
-                'temperature': reading.temperature,
-                'humidity': reading.humidity,
-                'air_quality_index': reading.air_quality_index,
-                'is_anomaly': reading.is_anomaly
-            })
+        # Columns are selected in latest_reading_entry's argument order
+        readings = db.session.execute(
+            select(
+                SensorReading.id,
+                SensorReading.timestamp,
+                DronePosition.latitude,
+                DronePosition.longitude,
+                DronePosition.altitude,
+                SensorReading.temperature,
+                SensorReading.humidity,
+                SensorReading.air_quality_index,
+                SensorReading.is_anomaly
+            ).join(DronePosition).order_by(SensorReading.timestamp.desc()).limit(limit)
+        ).all()
+        readings_data = [latest_reading_entry(*reading) for reading in readings]
         
         return jsonify(readings_data), 200
     
+    # API Endpoint: Stream new sensor readings as server-sent events
+    @app.route('/api/sensor_readings/stream', methods=['GET'])
+    def stream_sensor_readings():
+        if db.engine.dialect.name != 'postgresql':
+            return jsonify({'error': 'Streaming requires PostgreSQL'}), 501
+        
+        if not stream_slots.acquire(blocking=False):
+            return jsonify({'error': 'Too many open streams, try again later'}), 503
+        
+        # A dedicated autocommit connection per client, outside the pool, so
+        # notifications are delivered as soon as they arrive
+        conninfo = db.engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+        
+        def event_stream():
+            conn = psycopg.connect(conninfo, autocommit=True)
+            try:
+                conn.execute(f'LISTEN {NEW_READING_CHANNEL}')
+                while True:
+                    for notify in conn.notifies(timeout=15):
+                        reading = json.loads(notify.payload)
+                        reading['timestamp'] = datetime.fromisoformat(reading.pop('timestamp'))
+                        yield f"data: {app.json.dumps(latest_reading_entry(reading.pop('id'), **reading))}\n\n"
+                    # Comment line to keep proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+            finally:
+                # The server closes the generator once a write to a
+                # disconnected client fails (at the latest on the next
+                # keepalive), which stops listening right away
+                conn.close()
+        
+        response = Response(event_stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+        response.call_on_close(stream_slots.release)
+        return response
+    
     @app.route('/api/simulation/start', methods=['POST'])
     def start_simulation():
         """Start a new drone simulation with custom configuration"""
@@ -231,9 +547,15 @@ def create_app(test_config=None):
 # Create the app instance for regular use (not testing)
 app = create_app()
 
-# Initialize database for regular use
-with app.app_context():
-    db.create_all()
-
 if __name__ == '__main__':
-    app.run(debug=True) 
\ No newline at end of file
+    # Create any missing tables before serving; importing the module no
+    # longer touches the database
+    with app.app_context():
+        db.create_all()
+    
+    if app.config.get('DEBUG'):
+        app.run(debug=True, threaded=True)
+    else:
+        # Serve with a multi-threaded WSGI server so DB-bound requests overlap
+        from waitress import serve
+        serve(app, host='127.0.0.1', port=5000, threads=int(os.getenv('BACKEND_THREADS', '8'))) 
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Optional Redis cache for serialized API responses.
+
+The cache is only active when REDIS_URL is configured and the redis package
+is installed. Otherwise every lookup is a miss and writes are ignored, so the
+API behaves exactly as it does without a cache.
+"""
+
+import logging
+from flask import current_app
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+FLIGHTS_KEY = 'flights:all'
+LATEST_READINGS_KEY = 'latest_readings'
+LATEST_READINGS_MAX = 1000
+
+# Flight data expiry in seconds. Closed flights rarely change, but queued
+# samples written after a response was built must not be hidden forever
+OPEN_FLIGHT_TTL = 60
+CLOSED_FLIGHT_TTL = 3600
+
+def flight_data_key(flight_id):
+    """Return the cache key for a flight's full data response."""
+    return f'flight:{flight_id}:data'
+
+class ResponseCache:
+    """Flask extension wrapping a Redis client for response caching."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the Redis client for an application if one is configured.
+
+        Args:
+            app: Flask application instance
+        """
+        url = app.config.get('REDIS_URL')
+        client = None
+        if url and redis is not None:
+            client = redis.Redis.from_url(url)
+        elif url:
+            logger.warning("REDIS_URL is set but the redis package is not installed; caching disabled")
+        app.extensions['redis'] = client
+
+    @property
+    def client(self):
+        return current_app.extensions.get('redis')
+
+    def get(self, key):
+        """Fetch a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            bytes: The cached value, or None on a miss or if caching is disabled
+        """
+        client = self.client
+        if client is None:
+            return None
+        try:
+            return client.get(key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+
+    def set(self, key, value, ex=None):
+        """Store a value, optionally expiring after ex seconds.
+
+        Args:
+            key: Cache key
+            value: Serialized value to store
+            ex: Expiry in seconds, or None to keep the value until invalidated
+        """
+        client = self.client
+        if client is None:
+            return
+        try:
+            client.set(key, value, ex=ex)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+    def delete(self, *keys):
+        """Invalidate one or more keys.
+
+        Args:
+            keys: Cache keys to remove
+        """
+        client = self.client
+        if client is None:
+            return
+        try:
+            client.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {keys}: {e}")
+
+    def add_latest_readings(self, entries):
+        """Add readings to the capped sorted set of latest readings.
+
+        Args:
+            entries: Dictionary mapping serialized readings to their timestamp
+                as seconds since the epoch
+        """
+        client = self.client
+        if client is None or not entries:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.zadd(LATEST_READINGS_KEY, entries)
+            pipe.zremrangebyrank(LATEST_READINGS_KEY, 0, -LATEST_READINGS_MAX - 1)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cache write failed for {LATEST_READINGS_KEY}: {e}")
+
+    def get_latest_readings(self, limit):
+        """Fetch the most recent serialized readings, newest first.
+
+        Args:
+            limit: Number of readings to return
+
+        Returns:
+            list: Serialized readings, or None if the cache cannot answer the
+                request in full (disabled, cold, or limit outside 1..cap)
+        """
+        client = self.client
+        if client is None or not 1 <= limit <= LATEST_READINGS_MAX:
+            return None
+        try:
+            items = client.zrevrange(LATEST_READINGS_KEY, 0, limit - 1)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {LATEST_READINGS_KEY}: {e}")
+            return None
+        if len(items) < limit:
+            return None
+        return items
+
+cache = ResponseCache()
@@ -0,0 +1,50 @@
+"""
+Redis stream used for asynchronous ingest of drone samples.
+
+When ASYNC_INGEST is enabled the log_data endpoints validate each request,
+append its samples to the stream and return 202 before anything is written to
+the database. backend.ingest_worker drains the stream in batches.
+"""
+
+import logging
+from datetime import datetime, UTC
+import msgspec
+
+try:
+    from .cache import cache
+    from .schemas import LogData
+except ImportError:
+    from backend.cache import cache
+    from backend.schemas import LogData
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'ingest:readings'
+GROUP = 'ingest-workers'
+
+samples_decoder = msgspec.json.Decoder(list[LogData])
+
+def enqueue_samples(flight_id, samples):
+    """Append samples for a flight to the ingest stream.
+
+    Args:
+        flight_id: ID of the flight the samples belong to
+        samples: List of decoded LogData samples
+
+    Returns:
+        bool: True if the samples were queued, False if Redis is unavailable
+            and the caller should write them itself
+    """
+    client = cache.client
+    if client is None:
+        return False
+
+    # Stamp samples now rather than when the worker gets to them
+    now = datetime.now(UTC)
+    samples = [s if s.timestamp else msgspec.structs.replace(s, timestamp=now) for s in samples]
+    try:
+        client.xadd(STREAM_KEY, {'flight_id': flight_id, 'samples': msgspec.json.encode(samples)})
+    except Exception as e:
+        logger.warning(f"Could not queue samples for flight {flight_id}: {e}")
+        return False
+    return True
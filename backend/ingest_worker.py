@@ -0,0 +1,121 @@
+"""
+Worker that drains the ingest stream into the database.
+
+Run with: python -m backend.ingest_worker
+
+Samples queued by the log_data endpoints are read from the Redis stream in
+batches through a consumer group, written in a single transaction and then
+acknowledged. Messages left unacknowledged by a crash are retried when the
+consumer restarts.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import sys
+import time
+from collections import defaultdict
+from sqlalchemy import text
+
+# Add the project root to Python path for direct script execution
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from backend.app import app, insert_samples, cache_latest_readings
+from backend.cache import cache, flight_data_key
+from backend.ingest import STREAM_KEY, GROUP, samples_decoder
+from backend.models import db
+
+logger = logging.getLogger(__name__)
+
+def ensure_group(client):
+    """Create the consumer group (and the stream) if they do not exist yet.
+
+    Args:
+        client: Redis client
+    """
+    try:
+        client.xgroup_create(STREAM_KEY, GROUP, id='0', mkstream=True)
+    except Exception as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+def process_messages(messages):
+    """Write the samples from a batch of stream messages in one transaction.
+
+    Args:
+        messages: List of (message_id, fields) pairs read from the stream
+    """
+    samples_by_flight = defaultdict(list)
+    for _, fields in messages:
+        samples_by_flight[int(fields[b'flight_id'])].extend(samples_decoder.decode(fields[b'samples']))
+
+    # Queued samples are already acknowledged to the client, so don't wait
+    # for the WAL flush on commit
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(text('SET LOCAL synchronous_commit = OFF'))
+
+    cached_rows = []
+    for flight_id, samples in samples_by_flight.items():
+        results = insert_samples(flight_id, samples)
+        cached_rows.extend(
+            (reading_id, ts, s, is_anomaly)
+            for (_, reading_id, is_anomaly, ts), s in zip(results, samples)
+        )
+    db.session.commit()
+
+    cache.delete(*[flight_data_key(flight_id) for flight_id in samples_by_flight])
+    cache_latest_readings(cached_rows)
+
+def run(consumer, batch_size=1000, block_ms=5000):
+    """Consume the ingest stream until interrupted.
+
+    Args:
+        consumer: Name of this consumer within the group
+        batch_size: Maximum number of messages written per transaction
+        block_ms: How long to wait for new messages before polling again
+    """
+    with app.app_context():
+        client = cache.client
+        if client is None:
+            raise SystemExit("REDIS_URL must be set to run the ingest worker")
+        ensure_group(client)
+
+        # Start with messages this consumer read but never acknowledged
+        pending = True
+        while True:
+            response = client.xreadgroup(
+                GROUP, consumer, {STREAM_KEY: '0' if pending else '>'},
+                count=batch_size, block=None if pending else block_ms
+            )
+            messages = response[0][1] if response else []
+            if not messages:
+                pending = False
+                continue
+
+            message_ids = [message_id for message_id, _ in messages]
+            try:
+                process_messages(messages)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to write {len(messages)} queued messages: {e}")
+                # Leave them pending and retry after a pause
+                pending = True
+                time.sleep(1)
+                continue
+
+            client.xack(STREAM_KEY, GROUP, *message_ids)
+            client.xdel(STREAM_KEY, *message_ids)
+            print(f"Wrote {len(messages)} queued messages")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drain queued drone samples into the database')
+    parser.add_argument('--consumer', type=str, default=socket.gethostname(), help='Consumer name within the group')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Maximum messages written per transaction')
+    parser.add_argument('--block-ms', type=int, default=5000, help='Milliseconds to wait for new messages')
+    args = parser.parse_args()
+
+    try:
+        run(args.consumer, args.batch_size, args.block_ms)
+    except KeyboardInterrupt:
+        print("Ingest worker stopped")
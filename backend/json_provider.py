@@ -0,0 +1,29 @@
+"""
+JSON provider that serializes API responses with orjson.
+"""
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Datetimes are passed through to Flask's default handler so responses keep
+    the same HTTP date format as before. Keys are emitted in insertion order
+    and output is always compact.
+    """
+
+    sort_keys = False
+    option = orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option), mimetype=self.mimetype
+        )
@@ -1,7 +1,28 @@
+from flask import has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import DDL, event
 from datetime import datetime
 
-db = SQLAlchemy()
+class RoutingSession(Session):
+    """Session that sends reads from GET requests to the read replica.
+    
+    The replica is the engine configured under the 'reader' bind key. Without
+    one, or outside GET requests, every statement uses the primary database.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and 'reader' in self._db.engines
+            and has_request_context()
+            and request.method == 'GET'
+        ):
+            return self._db.engines['reader']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Flight(db.Model):
     __tablename__ = 'flights'
@@ -18,6 +39,9 @@ class Flight(db.Model):
 
 class DronePosition(db.Model):
     __tablename__ = 'drone_positions'
+    __table_args__ = (
+        db.Index('ix_pos_flight_ts', 'flight_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     flight_id = db.Column(db.Integer, db.ForeignKey('flights.id'), nullable=False)
@@ -34,14 +58,54 @@ class DronePosition(db.Model):
 
 class SensorReading(db.Model):
     __tablename__ = 'sensor_readings'
+    __table_args__ = (
+        db.Index('ix_sr_pos_ts', 'drone_position_id', 'timestamp'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     drone_position_id = db.Column(db.Integer, db.ForeignKey('drone_positions.id'), nullable=False)
-    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
     temperature = db.Column(db.Float, nullable=False)  # in degrees Celsius
     humidity = db.Column(db.Float, nullable=False)     # in %
     air_quality_index = db.Column(db.Float, nullable=False)  # AQI value
-    is_anomaly = db.Column(db.Boolean, default=False)  # Flag for anomalous readings
+    # Flag for anomalous readings, computed by the database from the thresholds
+    is_anomaly = db.Column(
+        db.Boolean,
+        db.Computed('temperature > 30 OR temperature < 0 OR humidity > 90 OR air_quality_index > 150', persisted=True),
+        nullable=False
+    )
     
     def __repr__(self):
-        return f'<SensorReading {self.id} - Position {self.drone_position_id} - {self.timestamp}>' 
\ No newline at end of file
+        return f'<SensorReading {self.id} - Position {self.drone_position_id} - {self.timestamp}>' 
+
+# On PostgreSQL, announce every new reading on the new_reading channel so the
+# stream endpoint can push it to clients without polling
+NEW_READING_CHANNEL = 'new_reading'
+
+notify_new_reading_function = DDL("""
+CREATE OR REPLACE FUNCTION notify_new_reading() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('new_reading', json_build_object(
+        'id', NEW.id,
+        'timestamp', NEW.timestamp,
+        'latitude', p.latitude,
+        'longitude', p.longitude,
+        'altitude', p.altitude,
+        'temperature', NEW.temperature,
+        'humidity', NEW.humidity,
+        'air_quality_index', NEW.air_quality_index,
+        'is_anomaly', NEW.is_anomaly
+    )::text)
+    FROM drone_positions p WHERE p.id = NEW.drone_position_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+notify_new_reading_trigger = DDL("""
+CREATE TRIGGER sensor_readings_notify AFTER INSERT ON sensor_readings
+FOR EACH ROW EXECUTE FUNCTION notify_new_reading()
+""")
+
+event.listen(SensorReading.__table__, 'after_create', notify_new_reading_function.execute_if(dialect='postgresql'))
+event.listen(SensorReading.__table__, 'after_create', notify_new_reading_trigger.execute_if(dialect='postgresql'))
@@ -0,0 +1,27 @@
+"""
+Typed request bodies for the data logging endpoints.
+
+Payloads are decoded and validated in a single pass with msgspec, which is
+considerably faster than json.loads followed by per-field dict lookups.
+"""
+
+from datetime import datetime
+from typing import Optional
+import msgspec
+
+class LogData(msgspec.Struct):
+    """One drone position with its sensor reading."""
+    latitude: float
+    longitude: float
+    altitude: float
+    temperature: float
+    humidity: float
+    air_quality_index: float
+    timestamp: Optional[datetime] = None
+
+class LogDataBatch(msgspec.Struct):
+    """A batch of samples for the batch logging endpoint."""
+    samples: list[LogData]
+
+log_data_decoder = msgspec.json.Decoder(LogData)
+log_data_batch_decoder = msgspec.json.Decoder(LogDataBatch)
@@ -1,6 +1,7 @@
 """Tests for the API endpoints"""
 import json
 from datetime import datetime, UTC
+from unittest import mock
 from backend.models import Flight, DronePosition, SensorReading
 from backend.app import db
 
@@ -71,6 +72,7 @@ def test_log_flight_data(client, sample_flight):
     assert 'position_id' in data
     assert 'reading_id' in data
     assert 'is_anomaly' in data
+    assert response.headers['X-Anomaly'] == ('1' if data['is_anomaly'] else '0')
     
     # Verify the data was saved in the database
     position = db.session.get(DronePosition, data['position_id'])
@@ -112,11 +114,74 @@ def test_log_flight_data_anomaly(client, sample_flight):
     # Verify the anomaly was detected
     assert response.status_code == 201
     assert data['is_anomaly'] is True
+    assert response.headers['X-Anomaly'] == '1'
     
     # Verify the anomaly was saved in the database
     reading = db.session.get(SensorReading, data['reading_id'])
     assert reading.is_anomaly is True
 
+def test_log_flight_data_batch(client, sample_flight):
+    """Test logging a batch of flight data"""
+    # Create test data with one normal and one anomalous sample
+    samples = [
+        {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "latitude": 51.507351,
+            "longitude": -0.127758,
+            "altitude": 100.0,
+            "temperature": 20.0,
+            "humidity": 60.0,
+            "air_quality_index": 50.0
+        },
+        {
+            "timestamp": datetime.now(UTC).isoformat(),
+            "latitude": 51.507951,
+            "longitude": -0.127158,
+            "altitude": 105.0,
+            "temperature": 40.0,
+            "humidity": 60.0,
+            "air_quality_index": 50.0
+        }
+    ]
+    
+    # Request to log the batch
+    response = client.post(
+        f'/api/flights/{sample_flight.id}/log_data/batch',
+        json={'samples': samples}
+    )
+    data = json.loads(response.data)
+    
+    # Verify one result per sample, in order
+    assert response.status_code == 201
+    assert len(data['results']) == 2
+    assert data['results'][0]['is_anomaly'] is False
+    assert data['results'][1]['is_anomaly'] is True
+    assert response.headers['X-Anomaly-Count'] == '1'
+    
+    # Verify the data was saved in the database
+    for sample, result in zip(samples, data['results']):
+        position = db.session.get(DronePosition, result['position_id'])
+        assert position is not None
+        assert position.flight_id == sample_flight.id
+        assert position.latitude == sample['latitude']
+        
+        reading = db.session.get(SensorReading, result['reading_id'])
+        assert reading is not None
+        assert reading.drone_position_id == position.id
+        assert reading.temperature == sample['temperature']
+        assert reading.is_anomaly == result['is_anomaly']
+
+def test_log_flight_data_batch_empty(client, sample_flight):
+    """Test logging a batch without samples"""
+    response = client.post(
+        f'/api/flights/{sample_flight.id}/log_data/batch',
+        json={'samples': []}
+    )
+    data = json.loads(response.data)
+    
+    assert response.status_code == 400
+    assert 'error' in data
+
 def test_get_all_flights(client, sample_flight):
     """Test getting all flights"""
     # Request to get all flights
@@ -198,4 +263,62 @@ def test_flight_not_found(client):
     # Verify error response
     assert response.status_code == 404
     assert 'error' in data
-    assert 'not found' in data['error'] 
\ No newline at end of file
+    assert 'not found' in data['error']
+
+def test_json_response_format(client, sample_flight):
+    """Test that responses are compact and keep HTTP-date timestamps"""
+    response = client.get('/api/flights')
+    
+    assert response.status_code == 200
+    assert b'", "' not in response.data
+    flight = next(f for f in json.loads(response.data) if f['id'] == sample_flight.id)
+    assert list(flight) == ['id', 'start_time', 'end_time']
+    assert flight['start_time'].endswith(' GMT')
+
+def test_init_db_command(runner):
+    """Test the init-db CLI command"""
+    result = runner.invoke(args=['init-db'])
+    
+    assert result.exit_code == 0
+    assert 'Database tables created.' in result.output
+
+def test_log_flight_data_invalid_payload(client, sample_flight):
+    """Test logging data with a missing field"""
+    response = client.post(
+        f'/api/flights/{sample_flight.id}/log_data',
+        json={"latitude": 51.507351, "longitude": -0.127758}
+    )
+    data = json.loads(response.data)
+    
+    assert response.status_code == 400
+    assert 'altitude' in data['error']
+
+def test_stream_sensor_readings_requires_postgres(client):
+    """Test that the stream endpoint reports it needs PostgreSQL"""
+    response = client.get('/api/sensor_readings/stream')
+    
+    assert response.status_code == 501
+    assert 'error' in json.loads(response.data)
+
+def test_stream_sensor_readings_limits_open_streams(app, client, monkeypatch):
+    """Test that streams beyond MAX_SSE_STREAMS are refused until one closes"""
+    monkeypatch.setattr(db.engine.dialect, 'name', 'postgresql')
+    with mock.patch('backend.app.psycopg.connect') as connect:
+        connect.return_value.notifies.return_value = []
+        streams = [client.get('/api/sensor_readings/stream') for _ in range(app.config['MAX_SSE_STREAMS'])]
+        for response in streams:
+            assert response.status_code == 200
+            assert next(response.response) == b': keepalive\n\n'
+        
+        response = client.get('/api/sensor_readings/stream')
+        assert response.status_code == 503
+        
+        # Closing a stream releases its LISTEN connection and its slot
+        streams.pop().close()
+        assert connect.return_value.close.call_count == 1
+        response = client.get('/api/sensor_readings/stream')
+        assert response.status_code == 200
+        streams.append(response)
+        
+        for response in streams:
+            response.close()
@@ -0,0 +1,92 @@
+import json
+from backend.cache import flight_data_key, FLIGHTS_KEY, LATEST_READINGS_KEY, CLOSED_FLIGHT_TTL
+
+def test_get_flight_data_is_cached(client, sample_flight, fake_redis):
+    """Test that flight data is served from the cache after the first read"""
+    key = flight_data_key(sample_flight.id)
+
+    response = client.get(f'/api/flights/{sample_flight.id}/data')
+    assert response.status_code == 200
+    assert fake_redis.store[key] == response.data
+    # Open flights expire so new data is picked up
+    assert fake_redis.expiry[key] == 60
+
+    # A cached response is returned as-is
+    fake_redis.store[key] = b'{"id": -1}'
+    response = client.get(f'/api/flights/{sample_flight.id}/data')
+    assert response.status_code == 200
+    assert json.loads(response.data) == {'id': -1}
+
+def test_log_data_invalidates_flight_cache(client, sample_flight, fake_redis):
+    """Test that logging data removes the cached flight data"""
+    key = flight_data_key(sample_flight.id)
+    client.get(f'/api/flights/{sample_flight.id}/data')
+    assert key in fake_redis.store
+
+    response = client.post(
+        f'/api/flights/{sample_flight.id}/log_data',
+        json={
+            "latitude": 51.507351,
+            "longitude": -0.127758,
+            "altitude": 100.0,
+            "temperature": 20.0,
+            "humidity": 60.0,
+            "air_quality_index": 50.0
+        }
+    )
+    assert response.status_code == 201
+    assert key not in fake_redis.store
+
+def test_end_flight_invalidates_caches(client, sample_flight, fake_redis):
+    """Test that ending a flight removes cached flight data and the flight list"""
+    client.get('/api/flights')
+    client.get(f'/api/flights/{sample_flight.id}/data')
+    assert FLIGHTS_KEY in fake_redis.store
+
+    response = client.post(f'/api/flights/{sample_flight.id}/end')
+    assert response.status_code == 200
+    assert FLIGHTS_KEY not in fake_redis.store
+    assert flight_data_key(sample_flight.id) not in fake_redis.store
+
+    # Closed flights are cached longer, but not forever
+    client.get(f'/api/flights/{sample_flight.id}/data')
+    assert fake_redis.expiry[flight_data_key(sample_flight.id)] == CLOSED_FLIGHT_TTL
+
+def test_latest_readings_served_from_cache(client, sample_flight, fake_redis):
+    """Test that logged readings are pushed to and served from the sorted set"""
+    for temperature in (20.0, 21.0, 40.0):
+        response = client.post(
+            f'/api/flights/{sample_flight.id}/log_data',
+            json={
+                "latitude": 51.507351,
+                "longitude": -0.127758,
+                "altitude": 100.0,
+                "temperature": temperature,
+                "humidity": 60.0,
+                "air_quality_index": 50.0
+            }
+        )
+        assert response.status_code == 201
+    assert len(fake_redis.store[LATEST_READINGS_KEY]) == 3
+
+    response = client.get('/api/sensor_readings/latest?limit=2')
+    data = json.loads(response.data)
+    assert response.status_code == 200
+    assert [reading['temperature'] for reading in data] == [40.0, 21.0]
+    assert data[0]['is_anomaly'] is True
+    assert data[0]['position']['latitude'] == 51.507351
+
+def test_latest_readings_cold_cache_uses_database(client, sample_reading, fake_redis):
+    """Test that a cache with too few readings falls back to the database"""
+    response = client.get('/api/sensor_readings/latest?limit=1')
+    data = json.loads(response.data)
+    assert response.status_code == 200
+    assert data[0]['id'] == sample_reading.id
+
+def test_latest_readings_rejects_non_positive_limit(client, sample_reading, fake_redis):
+    """Test that a limit below one is rejected instead of returning the whole set"""
+    fake_redis.store[LATEST_READINGS_KEY] = {b'{}': 1.0}
+    for limit in (0, -1):
+        response = client.get(f'/api/sensor_readings/latest?limit={limit}')
+        assert response.status_code == 400
+        assert 'limit' in json.loads(response.data)['error']
@@ -0,0 +1,81 @@
+import json
+import pytest
+from backend.models import db, DronePosition, SensorReading
+from backend.ingest import STREAM_KEY
+from backend.ingest_worker import process_messages
+
+@pytest.fixture(scope='function')
+def async_ingest(app, fake_redis):
+    """Enable asynchronous ingest for a single test"""
+    app.config['ASYNC_INGEST'] = True
+    yield fake_redis
+    app.config['ASYNC_INGEST'] = False
+
+def test_log_data_is_queued(client, sample_flight, async_ingest):
+    """Test that log_data queues the sample instead of writing it"""
+    positions_before = DronePosition.query.filter_by(flight_id=sample_flight.id).count()
+
+    response = client.post(
+        f'/api/flights/{sample_flight.id}/log_data',
+        json={
+            "latitude": 51.507351,
+            "longitude": -0.127758,
+            "altitude": 100.0,
+            "temperature": 40.0,
+            "humidity": 60.0,
+            "air_quality_index": 50.0
+        }
+    )
+
+    assert response.status_code == 202
+    assert json.loads(response.data)['status'] == 'queued'
+    assert len(async_ingest.store[STREAM_KEY]) == 1
+    assert DronePosition.query.filter_by(flight_id=sample_flight.id).count() == positions_before
+
+def test_worker_writes_queued_samples(client, sample_flight, async_ingest):
+    """Test that the worker writes queued samples from several requests"""
+    sample = {
+        "latitude": 51.507351,
+        "longitude": -0.127758,
+        "altitude": 100.0,
+        "temperature": 20.0,
+        "humidity": 60.0,
+        "air_quality_index": 50.0
+    }
+    client.post(f'/api/flights/{sample_flight.id}/log_data', json=sample)
+    client.post(
+        f'/api/flights/{sample_flight.id}/log_data/batch',
+        json={'samples': [sample, {**sample, "temperature": 40.0}]}
+    )
+    positions_before = DronePosition.query.filter_by(flight_id=sample_flight.id).count()
+
+    process_messages(async_ingest.store[STREAM_KEY])
+
+    positions = DronePosition.query.filter_by(flight_id=sample_flight.id).all()
+    assert len(positions) == positions_before + 3
+    temperatures = sorted(
+        reading.temperature for position in positions for reading in position.sensor_readings
+    )
+    assert temperatures.count(40.0) == 1
+    assert SensorReading.query.filter_by(temperature=40.0, is_anomaly=True).count() >= 1
+
+def test_log_data_without_redis_writes_directly(client, sample_flight, app):
+    """Test that asynchronous ingest falls back to direct writes without Redis"""
+    app.config['ASYNC_INGEST'] = True
+    try:
+        response = client.post(
+            f'/api/flights/{sample_flight.id}/log_data',
+            json={
+                "latitude": 51.507351,
+                "longitude": -0.127758,
+                "altitude": 100.0,
+                "temperature": 20.0,
+                "humidity": 60.0,
+                "air_quality_index": 50.0
+            }
+        )
+    finally:
+        app.config['ASYNC_INGEST'] = False
+
+    assert response.status_code == 201
+    assert db.session.get(DronePosition, json.loads(response.data)['position_id']) is not None
@@ -65,8 +65,7 @@ def test_sensor_reading_model(session, sample_position):
         timestamp=datetime.now(UTC),
         temperature=20.0,
         humidity=60.0,
-        air_quality_index=50.0,
-        is_anomaly=False
+        air_quality_index=50.0
     )
     session.add(reading)
     session.commit()
@@ -81,8 +80,8 @@ def test_sensor_reading_model(session, sample_position):
     assert retrieved_reading.air_quality_index == 50.0
     assert retrieved_reading.is_anomaly is False
     
-    # Test updating a reading
-    retrieved_reading.is_anomaly = True
+    # Test updating a reading recomputes the anomaly flag
+    retrieved_reading.temperature = 35.0
     session.commit()
     
     # Verify the update
@@ -117,8 +116,7 @@ def test_cascading_delete(session):
         timestamp=datetime.now(UTC),
         temperature=20.0,
         humidity=60.0,
-        air_quality_index=50.0,
-        is_anomaly=False
+        air_quality_index=50.0
     )
     session.add(reading)
     session.commit()
@@ -0,0 +1,13 @@
+-- Replace the application-maintained is_anomaly flag with a generated column
+-- on an existing drone_monitoring_db (new databases get it from db.create_all())
+-- Run with: psql -d drone_monitoring_db -f migrate_is_anomaly.sql
+-- Note: the table is rewritten, so run this while the backend is stopped
+
+BEGIN;
+
+ALTER TABLE sensor_readings DROP COLUMN is_anomaly;
+
+ALTER TABLE sensor_readings ADD COLUMN is_anomaly BOOLEAN NOT NULL
+    GENERATED ALWAYS AS (temperature > 30 OR temperature < 0 OR humidity > 90 OR air_quality_index > 150) STORED;
+
+COMMIT;
@@ -0,0 +1,26 @@
+-- Publish every new sensor reading on the new_reading channel, for the
+-- /api/sensor_readings/stream endpoint, on an existing drone_monitoring_db
+-- (new databases get this from db.create_all())
+-- Run with: psql -d drone_monitoring_db -f notify_new_reading.sql
+
+CREATE OR REPLACE FUNCTION notify_new_reading() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('new_reading', json_build_object(
+        'id', NEW.id,
+        'timestamp', NEW.timestamp,
+        'latitude', p.latitude,
+        'longitude', p.longitude,
+        'altitude', p.altitude,
+        'temperature', NEW.temperature,
+        'humidity', NEW.humidity,
+        'air_quality_index', NEW.air_quality_index,
+        'is_anomaly', NEW.is_anomaly
+    )::text)
+    FROM drone_positions p WHERE p.id = NEW.drone_position_id;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sensor_readings_notify ON sensor_readings;
+CREATE TRIGGER sensor_readings_notify AFTER INSERT ON sensor_readings
+FOR EACH ROW EXECUTE FUNCTION notify_new_reading();
@@ -0,0 +1,83 @@
+-- Convert sensor_readings into a table range-partitioned by month on timestamp
+-- Run with: psql -d drone_monitoring_db -f partition_sensor_readings.sql
+-- Note: copies every reading, so run this while the backend is stopped
+--
+-- Inserts only touch the current month's partition and its (small) indexes,
+-- and old months can be detached or dropped as a whole. Queries filtering on
+-- timestamp skip partitions outside their range. The btree index on timestamp
+-- is kept: each partition's index still serves ORDER BY timestamp DESC LIMIT n
+-- for the latest readings endpoint, which a BRIN index cannot.
+--
+-- The PostgreSQL primary key of a partitioned table must include the partition
+-- key, so it becomes (id, timestamp). IDs still come from the same sequence and
+-- stay unique, so the application keeps addressing readings by id alone.
+
+BEGIN;
+
+-- Move the existing table and its indexes out of the way
+ALTER TABLE sensor_readings RENAME TO sensor_readings_old;
+ALTER TABLE sensor_readings_old RENAME CONSTRAINT sensor_readings_pkey TO sensor_readings_old_pkey;
+ALTER INDEX ix_sensor_readings_timestamp RENAME TO ix_sensor_readings_timestamp_old;
+ALTER INDEX IF EXISTS ix_sr_pos_ts RENAME TO ix_sr_pos_ts_old;
+
+CREATE TABLE sensor_readings (
+    id INTEGER NOT NULL DEFAULT nextval('sensor_readings_id_seq'),
+    drone_position_id INTEGER NOT NULL REFERENCES drone_positions (id),
+    timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    temperature FLOAT NOT NULL,
+    humidity FLOAT NOT NULL,
+    air_quality_index FLOAT NOT NULL,
+    is_anomaly BOOLEAN NOT NULL
+        GENERATED ALWAYS AS (temperature > 30 OR temperature < 0 OR humidity > 90 OR air_quality_index > 150) STORED,
+    PRIMARY KEY (id, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+ALTER SEQUENCE sensor_readings_id_seq OWNED BY sensor_readings.id;
+
+CREATE INDEX ix_sensor_readings_timestamp ON sensor_readings (timestamp);
+CREATE INDEX ix_sr_pos_ts ON sensor_readings (drone_position_id, timestamp);
+
+-- Create the partition holding a given month, if it does not exist yet
+CREATE OR REPLACE FUNCTION create_sensor_readings_partition(month DATE) RETURNS void AS $$
+DECLARE
+    start_date DATE := date_trunc('month', month);
+    end_date DATE := date_trunc('month', month) + INTERVAL '1 month';
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF sensor_readings FOR VALUES FROM (%L) TO (%L)',
+        'sensor_readings_' || to_char(start_date, 'YYYY_MM'), start_date, end_date
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions for every month with existing data, up to three months ahead
+SELECT create_sensor_readings_partition(month::date)
+FROM generate_series(
+    date_trunc('month', COALESCE((SELECT min(timestamp) FROM sensor_readings_old), now())),
+    date_trunc('month', now()) + INTERVAL '3 months',
+    INTERVAL '1 month'
+) AS month;
+
+-- Catch-all for readings outside the created months
+CREATE TABLE sensor_readings_default PARTITION OF sensor_readings DEFAULT;
+
+INSERT INTO sensor_readings (id, drone_position_id, timestamp, temperature, humidity, air_quality_index)
+SELECT id, drone_position_id, timestamp, temperature, humidity, air_quality_index
+FROM sensor_readings_old;
+
+DROP TABLE sensor_readings_old;
+
+-- Keep publishing new readings if notify_new_reading.sql was applied
+-- (created after the copy so existing rows are not re-announced)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'notify_new_reading') THEN
+        CREATE TRIGGER sensor_readings_notify AFTER INSERT ON sensor_readings
+        FOR EACH ROW EXECUTE FUNCTION notify_new_reading();
+    END IF;
+END $$;
+
+COMMIT;
+
+-- Schedule this monthly (cron, pg_cron or pg_partman) to keep partitions ahead of the data:
+--   SELECT create_sensor_readings_partition((now() + INTERVAL '3 months')::date);
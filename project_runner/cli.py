@@ -5,11 +5,11 @@ This module provides the main CLI functionality for starting project components.
 """
 
 import sys
-import time
 import signal
 import argparse
 import logging
 import atexit
+from concurrent.futures import ThreadPoolExecutor
 
 from project_runner import postgres, servers, process
 
@@ -54,6 +54,20 @@ def setup_logging(verbose=False):
     else:
         logging.getLogger().setLevel(logging.INFO)
 
+def ensure_postgres():
+    """Start PostgreSQL unless it is already running.
+    
+    Returns:
+        bool: True if PostgreSQL is running, False otherwise
+    """
+    if postgres.is_postgres_running():
+        logger.info("PostgreSQL is already running")
+        return True
+    if not postgres.start_postgres():
+        logger.warning("PostgreSQL could not be started. Database functionality may not work.")
+        return False
+    return True
+
 def main():
     """Main entry point for the CLI."""
     args = parse_args()
@@ -65,24 +79,25 @@ def main():
     
     logger.info("Starting Drone Simulation Project components")
     
-    # Check PostgreSQL status
-    if not postgres.is_postgres_running():
-        if not postgres.start_postgres():
-            logger.warning("PostgreSQL could not be started. Database functionality may not work.")
-    else:
-        logger.info("PostgreSQL is already running")
-    
-    # Start backend if requested
+    # Start PostgreSQL and the frontend concurrently so their readiness waits
+    # overlap. The backend creates its tables on startup, so it is only
+    # started once PostgreSQL is up; the simulation waits for the backend.
     backend_running = False
-    if not args.no_backend:
-        backend_running = servers.start_backend(processes)
-    
-    # Start frontend if requested
     frontend_running = False
-    if not args.no_frontend:
-        frontend_running = servers.start_frontend(processes)
-        if not frontend_running:
-            logger.warning("Frontend server failed to start.")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        postgres_future = executor.submit(ensure_postgres)
+        frontend_future = None if args.no_frontend else executor.submit(servers.start_frontend, processes)
+        try:
+            postgres_future.result()
+        except Exception as e:
+            logger.error(f"Error starting PostgreSQL: {e}")
+        backend_future = None if args.no_backend else executor.submit(servers.start_backend, processes)
+        if backend_future is not None:
+            backend_running = backend_future.result()
+        if frontend_future is not None:
+            frontend_running = frontend_future.result()
+            if not frontend_running:
+                logger.warning("Frontend server failed to start.")
     
     # Start simulation if requested
     if args.simulation:
@@ -102,7 +117,7 @@ def main():
     # Keep the script running until interrupted
     try:
         while process.monitor_processes(processes):
-            time.sleep(1)
+            process.wait_for_exit(processes)
         
         print("All components have stopped. Exiting.")
     except KeyboardInterrupt:
@@ -4,11 +4,33 @@ PostgreSQL management module for the project runner.
 This module handles checking if PostgreSQL is running and starting it if needed.
 """
 
+import os
 import time
+import shutil
+import socket
 import subprocess
 import platform
 import configparser
 import pathlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+from project_runner.process import tail_stderr, stderr_output
+
+CONFIG_PATH = pathlib.Path('config.ini')
+
+# Port pg_isready checks by default
+PG_PORT = int(os.environ.get('PGPORT', 5432))
+
+# Where pg_isready connects when PGHOST is unset: the local Unix socket
+# (Debian/Ubuntu packages put it in /var/run/postgresql, source builds and
+# Homebrew in /tmp), or localhost over TCP on Windows
+DEFAULT_PG_HOSTS = ['localhost'] if platform.system() == 'Windows' else ['/var/run/postgresql', '/tmp']
+
+# When _pg_ready last saw the server accepting connections: port -> expiry
+# (time.monotonic()) of that result
+_pg_ready_cache = {}
+READY_CACHE_TTL = 5
 
 # Default PostgreSQL paths by platform
 DEFAULT_PATHS = {
@@ -29,10 +51,39 @@ DEFAULT_PATHS = {
     }
 }
 
+@dataclass(frozen=True, slots=True)
+class PgConfig:
+    """Paths used to check and start PostgreSQL."""
+    pg_isready: str
+    pg_ctl: str
+    data_dir: str
+
 def get_config():
-    """Get PostgreSQL configuration from config file or use defaults."""
+    """Get PostgreSQL configuration from config file or use defaults.
+    
+    config.ini is only parsed again when its modification time changes.
+    
+    Returns:
+        PgConfig: Paths to pg_isready, pg_ctl and the data directory
+    """
+    try:
+        mtime_ns = CONFIG_PATH.stat().st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    return _load_config(mtime_ns)
+
+@lru_cache(maxsize=1)
+def _load_config(mtime_ns):
+    """Build the configuration for a given version of config.ini.
+    
+    Args:
+        mtime_ns: Modification time of config.ini (None if it is missing),
+            used only as the cache key
+        
+    Returns:
+        PgConfig: Paths to pg_isready, pg_ctl and the data directory
+    """
     config = {}
-    config_path = pathlib.Path('config.ini')
     
     # Set defaults based on platform
     system = platform.system()
@@ -42,26 +93,93 @@ def get_config():
         config.update(DEFAULT_PATHS['Linux'])  # Default to Linux paths
     
     # Override with config file if it exists
-    if config_path.exists():
+    if CONFIG_PATH.exists():
         parser = configparser.ConfigParser()
-        parser.read(config_path)
+        parser.read(CONFIG_PATH)
         if 'PostgreSQL' in parser:
             for key, value in parser['PostgreSQL'].items():
                 if key in ['pg_isready', 'pg_ctl', 'data_dir'] and value:
                     config[key] = value
     
-    return config
+    return PgConfig(**config)
+
+@lru_cache(maxsize=None)
+def _resolve_executable(path):
+    """Resolve an executable once rather than on every invocation.
+    
+    Args:
+        path: Executable name or path from the configuration
+        
+    Returns:
+        str: Full path found on PATH, or the configured value unchanged
+    """
+    return shutil.which(path) or path
+
+def _port_open(port, timeout=0.1):
+    """Check whether anything accepts connections where pg_isready would connect.
+    
+    Follows PGHOST like pg_isready: a path is a directory holding the Unix
+    socket, anything else a host name reached over TCP (IPv4 or IPv6).
+    
+    Args:
+        port: PostgreSQL port, which also names the Unix socket
+        timeout: Connection timeout in seconds
+        
+    Returns:
+        bool: True if any of the hosts accepts a connection
+    """
+    pghost = os.environ.get('PGHOST')
+    hosts = pghost.split(',') if pghost else DEFAULT_PG_HOSTS
+    for host in hosts:
+        try:
+            if host.startswith('/'):
+                with socket.socket(socket.AF_UNIX) as sock:
+                    sock.settimeout(timeout)
+                    sock.connect(os.path.join(host, f'.s.PGSQL.{port}'))
+            else:
+                with socket.create_connection((host, port), timeout=timeout):
+                    pass
+            return True
+        except OSError:
+            continue
+    return False
+
+def _pg_ready(config, timeout=5):
+    """Check whether the server is accepting connections.
+    
+    pg_isready is only run once something listens where it would connect,
+    and a positive answer is reused for READY_CACHE_TTL seconds, so most
+    checks don't spawn a process at all.
+    
+    Args:
+        config: PostgreSQL configuration from get_config()
+        timeout: Maximum time to wait for pg_isready in seconds
+        
+    Returns:
+        bool: True if the server is accepting connections
+    """
+    if time.monotonic() < _pg_ready_cache.get(PG_PORT, 0):
+        return True
+    if not _port_open(PG_PORT):
+        return False
+    
+    # A server that is still starting up already accepts TCP connections, so
+    # pg_isready has the final say. Its output is only searched, so leave it
+    # as bytes rather than decoding it
+    result = subprocess.run(
+        [_resolve_executable(config.pg_isready)],
+        capture_output=True,
+        timeout=timeout
+    )
+    ready = b"accepting connections" in result.stdout
+    if ready:
+        _pg_ready_cache[PG_PORT] = time.monotonic() + READY_CACHE_TTL
+    return ready
 
 def is_postgres_running():
     """Check if PostgreSQL is running using pg_isready."""
-    config = get_config()
     try:
-        result = subprocess.run(
-            [config['pg_isready']],
-            capture_output=True,
-            text=True
-        )
-        if "accepting connections" in result.stdout:
+        if _pg_ready(get_config()):
             print("PostgreSQL is running and accepting connections")
             return True
         else:
@@ -74,6 +192,9 @@ def is_postgres_running():
 def start_postgres(timeout=30):
     """Start PostgreSQL using pg_ctl with timeout handling.
     
+    Args:
+        timeout: Maximum time to wait for pg_ctl in seconds
+    
     Returns:
         tuple: (bool, subprocess.Popen) - Success status and the process (or None if already running)
     """
@@ -81,14 +202,7 @@ def start_postgres(timeout=30):
     
     # First check if PostgreSQL is already running
     try:
-        check_result = subprocess.run(
-            [config['pg_isready']],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        
-        if "accepting connections" in check_result.stdout:
+        if _pg_ready(config):
             print("PostgreSQL is already running and accepting connections")
             return True, None
     except Exception:
@@ -98,52 +212,49 @@ def start_postgres(timeout=30):
     try:
         print("Starting PostgreSQL server...")
         
-        # Start PostgreSQL as a background process
+        # Start PostgreSQL as a background process. Without -l the server
+        # inherits pg_ctl's output, so stderr is drained continuously rather
+        # than read after exit, or a chatty server would block on a full pipe.
+        # pg_ctl is deliberately left in the runner's process group (unlike the
+        # servers): it exits once the server is up, so clean_up cannot stop the
+        # postmaster through it, and sharing the group lets Ctrl+C reach it
+        # close_fds=False is kept here because, without a new session, it lets
+        # CPython start pg_ctl with posix_spawn instead of fork and exec; the
+        # servers' Popen calls cannot use posix_spawn, so they keep the default
         process = subprocess.Popen(
-            [config['pg_ctl'], "start", "-D", config['data_dir'], "-w"],
-            stdout=subprocess.PIPE,
+            [config.pg_ctl, "start", "-D", config.data_dir, "-w"],
+            stdout=subprocess.DEVNULL,
             stderr=subprocess.PIPE,
-            text=True
+            close_fds=False
         )
+        stderr_tail, stderr_reader = tail_stderr(process)
         
-        # Add a timeout to prevent hanging
-        start_time = time.time()
-        max_wait_time = timeout  # Maximum wait time in seconds
-        
-        # Wait for the process to complete or timeout
-        while process.poll() is None:
-            if time.time() - start_time > max_wait_time:
-                print(f"PostgreSQL startup timeout after {max_wait_time} seconds")
-                process.terminate()
-                return False, process
-            time.sleep(0.5)
+        # Block until pg_ctl exits, with a timeout to prevent hanging
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            print(f"PostgreSQL startup timeout after {timeout} seconds")
+            process.terminate()
+            return False, process
         
         # Check the process return code
         if process.returncode != 0:
-            stderr_output = process.stderr.read()
+            error_output = stderr_output(stderr_tail, stderr_reader)
             # Check if it's already running (common error case)
-            if "already running" in stderr_output:
+            if "already running" in error_output:
                 print("PostgreSQL is already running")
                 return True, None
                 
             print(f"Failed to start PostgreSQL. Return code: {process.returncode}")
-            print(f"Error output: {stderr_output}")
+            print(f"Error output: {error_output}")
             return False, process
         
-        # Verify PostgreSQL is now running
-        for _ in range(5):  # Try checking a few times
-            check_result = subprocess.run(
-                [config['pg_isready']],
-                capture_output=True,
-                text=True,
-                timeout=5  # Add timeout to pg_isready call
-            )
-            
-            if "accepting connections" in check_result.stdout:
+        # Verify PostgreSQL is now running, backing off between checks
+        for delay in (0, 0.2, 0.4, 0.8, 1.6):
+            time.sleep(delay)
+            if _pg_ready(config):
                 print("PostgreSQL started successfully")
                 return True, process
-            
-            time.sleep(1)
         
         print("PostgreSQL process started but not accepting connections")
         return False, process
@@ -4,12 +4,25 @@ Process management module for the project runner.
 This module handles tracking and cleaning up child processes.
 """
 
+import os
 import time
+import signal
 import logging
+import threading
+import subprocess
+from collections import deque
+from multiprocessing.connection import wait
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Popen arguments that start a child in its own process group, so clean_up
+# can signal it together with anything it spawns (e.g. the dev server under npm)
+if os.name == 'nt':
+    NEW_PROCESS_GROUP = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    NEW_PROCESS_GROUP = {'start_new_session': True}
+
 def monitor_processes(processes_list):
     """Monitor processes and remove any that have exited.
     
@@ -27,24 +40,147 @@ def monitor_processes(processes_list):
     
     return len(processes_list) > 0
 
+def _exit_sentinel(process):
+    """Get a waitable object that becomes ready when a process exits.
+    
+    Args:
+        process: subprocess.Popen object
+        
+    Returns:
+        tuple: (sentinel, owned) where sentinel is a pidfd on Linux or the
+            process handle on Windows (None if neither is available) and owned
+            says whether the caller must close it
+    """
+    if hasattr(os, 'pidfd_open'):
+        try:
+            return os.pidfd_open(process.pid), True
+        except OSError:
+            return None, False
+    return getattr(process, '_handle', None), False
+
+def wait_for_exit(processes_list, timeout=None):
+    """Block until at least one process has exited.
+    
+    Waits on the processes' exit sentinels so nothing wakes up while all of
+    them are healthy. Platforms without process sentinels fall back to
+    checking again after a second.
+    
+    Args:
+        processes_list: List of subprocess.Popen objects
+        timeout: Maximum time to wait in seconds (None waits indefinitely)
+    """
+    sentinels = []
+    owned = []
+    try:
+        for process in processes_list:
+            if process.poll() is not None:
+                return
+            sentinel, is_owned = _exit_sentinel(process)
+            if sentinel is None:
+                time.sleep(1 if timeout is None else min(1, timeout))
+                return
+            sentinels.append(sentinel)
+            if is_owned:
+                owned.append(sentinel)
+        wait(sentinels, timeout)
+    finally:
+        for fd in owned:
+            os.close(fd)
+
+def tail_stderr(process, maxlen=200):
+    """Drain a child's stderr in the background, keeping only the last lines.
+    
+    Reading continuously stops a chatty server from filling the pipe buffer
+    and blocking on its next write.
+    
+    Args:
+        process: subprocess.Popen object started with stderr=PIPE
+        maxlen: Number of most recent lines to keep
+        
+    Returns:
+        tuple: (deque of recent stderr lines as bytes, reader thread)
+    """
+    tail = deque(maxlen=maxlen)
+    
+    def read():
+        for line in process.stderr:
+            tail.append(line)
+    
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+    return tail, reader
+
+def stderr_output(tail, reader):
+    """Collect the stderr kept by tail_stderr once the process has exited.
+    
+    Args:
+        tail: deque returned by tail_stderr
+        reader: Reader thread returned by tail_stderr
+        
+    Returns:
+        str: Decoded stderr output
+    """
+    reader.join(timeout=1)
+    return b"".join(tail).decode('utf-8', errors='replace')
+
+def _leads_group(process):
+    """Check whether a process leads its own process group (POSIX only).
+    
+    Only such children are signalled as a group, so the runner never signals
+    the group it belongs to itself.
+    
+    Args:
+        process: subprocess.Popen object
+        
+    Returns:
+        bool: True if the process group can be signalled as a whole
+    """
+    if not hasattr(os, 'killpg'):
+        return False
+    try:
+        return os.getpgid(process.pid) == process.pid
+    except OSError:
+        return False
+
 def clean_up(processes_list):
     """Terminate all child processes gracefully.
     
+    Every process is asked to terminate first so they all share a single
+    grace period, then any that are still running are killed. Processes
+    started with NEW_PROCESS_GROUP are signalled along with their group.
+    
     Args:
         processes_list: List of subprocess.Popen objects
     """
     print("\nShutting down all processes...")
+    terminated = []
     for process in processes_list:
         if process.poll() is None:  # Check if process is still running
             try:
                 logger.info(f"Terminating process {process.pid}")
-                process.terminate()
-                # Give it a moment to terminate gracefully
-                time.sleep(1)
-                
-                if process.poll() is None:
-                    logger.warning(f"Process {process.pid} did not terminate gracefully, killing")
-                    process.kill()
+                if _leads_group(process):
+                    os.killpg(process.pid, signal.SIGTERM)
+                else:
+                    process.terminate()
+                terminated.append(process)
             except Exception as e:
                 logger.error(f"Error terminating process {process.pid}: {e}")
-                print(f"Error terminating process: {e}") 
\ No newline at end of file
+                print(f"Error terminating process: {e}")
+    
+    if not terminated:
+        return
+    
+    # Give them a moment to terminate gracefully
+    time.sleep(1)
+    
+    for process in terminated:
+        if process.poll() is None:
+            try:
+                logger.warning(f"Process {process.pid} did not terminate gracefully, killing")
+                if _leads_group(process):
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+            except Exception as e:
+                logger.error(f"Error killing process {process.pid}: {e}")
+                print(f"Error killing process: {e}")
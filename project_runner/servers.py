@@ -7,22 +7,81 @@ This module handles starting and managing the backend and frontend servers.
 import os
 import sys
 import time
+import shutil
 import socket
 import subprocess
-from urllib.request import urlopen, URLError
+from functools import lru_cache
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit
+
+from project_runner.process import NEW_PROCESS_GROUP, tail_stderr, stderr_output
+
+# Recent check_port_in_use results: port -> (time.monotonic() of the check, in use)
+_port_cache = {}
+PORT_CACHE_TTL = 2
 
 def check_port_in_use(port):
-    """Check if a port is already in use."""
+    """Check if a port is already in use.
+    
+    Tries to bind the port on the loopback address, which fails straight away
+    if something holds it, rather than connecting to it, which can stall on a
+    filtered port. Results are reused for PORT_CACHE_TTL seconds.
+    """
+    now = time.monotonic()
+    cached = _port_cache.get(port)
+    if cached and now - cached[0] < PORT_CACHE_TTL:
+        return cached[1]
+    
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        return s.connect_ex(('localhost', port)) == 0
+        if hasattr(socket, 'SO_EXCLUSIVEADDRUSE'):
+            # On Windows SO_REUSEADDR would let the bind take over a port in use
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            # Don't count connections lingering in TIME_WAIT as a server
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind(('127.0.0.1', port))
+            in_use = False
+        except OSError:
+            in_use = True
+    
+    _port_cache[port] = (now, in_use)
+    return in_use
+
+def _wait_port_open(host, port, deadline, interval=0.1):
+    """Wait until a TCP port accepts connections.
+    
+    A bare TCP connect is far cheaper than an HTTP request, so it is retried
+    at a short interval until the server starts listening.
+    
+    Args:
+        host: Host name to connect to
+        port: Port number to connect to
+        deadline: time.monotonic() value after which to give up
+        interval: Time between connection attempts in seconds
+        
+    Returns:
+        bool: True if the port accepted a connection before the deadline
+    """
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            with socket.create_connection((host, port), timeout=remaining):
+                return True
+        except OSError:
+            time.sleep(max(0, min(interval, deadline - time.monotonic())))
 
 def wait_for_server(url, max_attempts=5, interval=1, timeout=5):
     """Wait for a server to be ready.
     
     Args:
         url: URL to check
-        max_attempts: Maximum number of attempts (default: 5)
-        interval: Time between attempts in seconds (default: 1)
+        max_attempts: Together with interval, sets the overall time limit
+            of max_attempts * interval seconds (default: 5)
+        interval: Longest time between attempts in seconds; retries start
+            faster and back off up to this (default: 1)
         timeout: Connection timeout in seconds (default: 5)
         
     Returns:
@@ -30,71 +89,92 @@ def wait_for_server(url, max_attempts=5, interval=1, timeout=5):
     """
     print(f"Waiting for {url} to become available...")
     attempt = 0
-    start_time = time.time()
-    max_time = start_time + (max_attempts * interval)
+    delay = min(0.05, interval)
+    start_time = time.monotonic()
+    deadline = start_time + (max_attempts * interval)
     
-    while time.time() < max_time:
-        try:
-            response = urlopen(url, timeout=timeout)
-            status = response.getcode()
-            if status == 200:
-                print(f"Server at {url} is available (status code: {status})")
-                return True
-            else:
-                print(f"Server at {url} returned status code: {status}")
-        except URLError as e:
-            # More informative error message
-            if hasattr(e, 'reason'):
-                if isinstance(e.reason, ConnectionRefusedError):
+    # Only start making HTTP requests once something is listening
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    if not _wait_port_open(parts.hostname, port, deadline):
+        print(f"Timed out after {time.monotonic() - start_time:.1f} seconds waiting for {url} to accept connections")
+        return False
+    
+    # Probe with HEAD requests over one kept-alive connection; it is only
+    # reopened after a failed attempt
+    connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+    connection = connection_class(parts.hostname, port, timeout=timeout)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    
+    try:
+        while (now := time.monotonic()) < deadline:
+            try:
+                connection.request("HEAD", path)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+                if status == 200:
+                    print(f"Server at {url} is available (status code: {status})")
+                    return True
+                else:
+                    print(f"Server at {url} returned status code: {status}")
+            except (OSError, HTTPException) as e:
+                connection.close()
+                # More informative error message
+                if isinstance(e, ConnectionRefusedError):
                     message = "Connection refused"
                 else:
-                    message = str(e.reason)
-            else:
-                message = str(e)
+                    message = str(e)
+                    
+                # Only log every 5 attempts to reduce noise
+                if attempt % 5 == 0 or attempt == 0:
+                    print(f"Attempt {attempt+1}: {message}")
+            except Exception as e:
+                connection.close()
+                if attempt % 5 == 0 or attempt == 0:
+                    print(f"Attempt {attempt+1}: Unexpected error: {e}")
                 
-            # Only log every 5 attempts to reduce noise
-            if attempt % 5 == 0 or attempt == 0:
-                print(f"Attempt {attempt+1}/{max_attempts}: {message}")
-        except Exception as e:
-            if attempt % 5 == 0 or attempt == 0:
-                print(f"Attempt {attempt+1}/{max_attempts}: Unexpected error: {e}")
+            attempt += 1
             
-        attempt += 1
-        
-        # Sleep until next interval, but don't exceed max time
-        next_check = min(time.time() + interval, max_time)
-        sleep_time = max(0, next_check - time.time())
-        if sleep_time > 0:
-            time.sleep(sleep_time)
+            # Back off exponentially up to interval, but don't go past the deadline
+            time.sleep(min(delay, deadline - now))
+            delay = min(delay * 2, interval)
+    finally:
+        connection.close()
     
-    elapsed = time.time() - start_time
+    elapsed = time.monotonic() - start_time
     print(f"Timed out after {elapsed:.1f} seconds waiting for {url}")
     return False
 
+@lru_cache(maxsize=1)
 def find_npm_path():
-    """Find the path to the npm executable."""
-    # First check if npm is in PATH
-    try:
-        npm_path = "npm"
-        subprocess.run([npm_path, "--version"], 
-                      stdout=subprocess.PIPE, 
-                      stderr=subprocess.PIPE, 
-                      check=True)
+    """Find the path to the npm executable.
+    
+    The result is looked up once and cached for the rest of the run.
+    
+    Returns:
+        str: Path to npm, or None if it could not be found
+    """
+    # First check if npm is in PATH (a filesystem lookup, no need to start Node.js)
+    npm_path = shutil.which("npm")
+    if npm_path:
         return npm_path
-    except (subprocess.SubprocessError, FileNotFoundError):
-        # If npm is not in PATH, try common installation locations
-        possible_paths = [
-            r"C:\Program Files\nodejs\npm.cmd",
-            r"C:\Program Files (x86)\nodejs\npm.cmd",
-            os.path.expanduser("~\\AppData\\Roaming\\npm\\npm.cmd")
-        ]
-        
-        for path in possible_paths:
-            if os.path.exists(path):
-                print(f"Found npm at: {path}")
-                return path
-        
-        return None  # npm not found
+    
+    # If npm is not in PATH, try common installation locations
+    possible_paths = [
+        r"C:\Program Files\nodejs\npm.cmd",
+        r"C:\Program Files (x86)\nodejs\npm.cmd",
+        os.path.expanduser("~\\AppData\\Roaming\\npm\\npm.cmd")
+    ]
+    
+    for path in possible_paths:
+        if os.path.exists(path):
+            print(f"Found npm at: {path}")
+            return path
+    
+    return None  # npm not found
 
 def start_backend(processes_list=None):
     """Start the Flask backend server.
@@ -119,14 +199,15 @@ def start_backend(processes_list=None):
     env["PYTHONPATH"] = project_root
     env["FLASK_DEBUG"] = "1"  # Enable Flask debug mode
     
-    # Start the Flask app as a module rather than a script
+    # Start the Flask app as a module rather than a script, in its own process group
     backend_process = subprocess.Popen(
         [sys.executable, "-m", "backend.app"],
-        cwd=project_root,
         env=env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        **NEW_PROCESS_GROUP
     )
+    stderr_tail, stderr_reader = tail_stderr(backend_process)
     
     # Add to processes list if provided
     if processes_list is not None:
@@ -135,7 +216,7 @@ def start_backend(processes_list=None):
     # Check if process failed immediately
     time.sleep(1)
     if backend_process.poll() is not None:
-        stderr = backend_process.stderr.read().decode('utf-8')
+        stderr = stderr_output(stderr_tail, stderr_reader)
         print(f"ERROR: Backend process exited immediately with code {backend_process.returncode}")
         print(f"Error details: {stderr}")
         return False
@@ -198,9 +279,11 @@ def start_frontend(processes_list=None):
             [npm_path, "start"],
             cwd=os.path.join(os.getcwd(), "frontend"),
             env={**os.environ, "BROWSER": "none"},  # Prevent browser from opening automatically
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            **NEW_PROCESS_GROUP  # so clean_up also stops the dev server npm spawns
         )
+        stderr_tail, stderr_reader = tail_stderr(frontend_process)
         
         # Add to processes list if provided
         if processes_list is not None:
@@ -213,7 +296,7 @@ def start_frontend(processes_list=None):
     # Check if process failed immediately
     time.sleep(1)
     if frontend_process.poll() is not None:
-        stderr = frontend_process.stderr.read().decode('utf-8')
+        stderr = stderr_output(stderr_tail, stderr_reader)
         print(f"ERROR: Frontend process exited immediately with code {frontend_process.returncode}")
         print(f"Error details: {stderr}")
         return False
@@ -244,7 +327,7 @@ def start_simulation(config=None, processes_list=None):
         cmd.extend(["--config", config])
     
     try:
-        simulation_process = subprocess.Popen(cmd, cwd=os.getcwd())
+        simulation_process = subprocess.Popen(cmd, **NEW_PROCESS_GROUP)
         
         # Add to processes list if provided
         if processes_list is not None:
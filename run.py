@@ -16,12 +16,12 @@ For more options:
 """
 
 import sys
-import subprocess
-import time
-import os
 import argparse
+import atexit
 import signal
-from project_runner import postgres, servers, process
+
+# project_runner and concurrent.futures are imported where they are used so
+# that `python run.py --help` doesn't pay for loading them
 
 # Global processes list for test compatibility
 processes = []
@@ -38,12 +38,29 @@ def parse_args():
     return parser.parse_args()
 
 def is_postgres_running():
-    """Check if PostgreSQL is running.
+    """Check if PostgreSQL is running."""
+    from project_runner import postgres
+    return postgres.is_postgres_running()
+
+def check_port_in_use(port):
+    """Check if a port is already in use."""
+    from project_runner import servers
+    return servers.check_port_in_use(port)
+
+def wait_for_server(url, max_attempts=5, interval=1, timeout=5):
+    """Wait for a server to be ready.
     
+    Args:
+        url: URL to check
+        max_attempts: Together with interval, sets the overall time limit
+        interval: Longest time between attempts in seconds
+        timeout: Connection timeout in seconds
+        
     Returns:
-        bool: True if PostgreSQL is running, False otherwise
+        bool: True if server became available, False otherwise
     """
-    return postgres.is_postgres_running()
+    from project_runner import servers
+    return servers.wait_for_server(url, max_attempts, interval, timeout)
 
 def start_postgres():
     """Start PostgreSQL server.
@@ -51,33 +68,25 @@ def start_postgres():
     Returns:
         bool: True if PostgreSQL was started successfully, False otherwise
     """
+    from project_runner import postgres
     result, process = postgres.start_postgres()
     if process:
         processes.append(process)
     return result
 
-def check_port_in_use(port):
-    """Check if a port is in use.
-    
-    Args:
-        port: Port number to check
-        
-    Returns:
-        bool: True if the port is in use, False otherwise
-    """
-    return servers.check_port_in_use(port)
-
-def wait_for_server(url, max_attempts=5):
-    """Wait for a server to become available.
+def ensure_postgres():
+    """Start PostgreSQL unless it is already running.
     
-    Args:
-        url: URL to check
-        max_attempts: Maximum number of attempts
-        
     Returns:
-        bool: True if server became available, False otherwise
+        bool: True if PostgreSQL is running, False otherwise
     """
-    return servers.wait_for_server(url, max_attempts)
+    if is_postgres_running():
+        print("PostgreSQL is already running")
+        return True
+    if not start_postgres():
+        print("PostgreSQL could not be started. Database functionality may not work.")
+        return False
+    return True
 
 def start_backend():
     """Start the backend server.
@@ -85,46 +94,8 @@ def start_backend():
     Returns:
         bool: True if server started successfully, False otherwise
     """
-    if check_port_in_use(5000):
-        print("WARNING: Port 5000 is already in use. Backend may not start correctly.")
-    
-    print("Starting backend server...")
-    
-    try:
-        # Start Flask backend as a module instead of directly
-        backend_path = os.path.join(os.path.dirname(__file__), 'backend')
-        
-        # Run Flask with debug mode using the -m flag to properly handle imports
-        process = subprocess.Popen(
-            [sys.executable, "-m", "backend.app"],
-            env={**os.environ, 'FLASK_DEBUG': '1'},
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        # Add to processes list
-        processes.append(process)
-        
-        # Check if process failed immediately
-        time.sleep(1)
-        if process.poll() is not None:
-            stderr = process.stderr.read().decode('utf-8')
-            print(f"ERROR: Backend process exited immediately with code {process.returncode}")
-            print(f"Error details: {stderr}")
-            return False
-        
-        # Wait for server to become available with longer timeout (60 seconds)
-        print("Waiting for backend server to be ready...")
-        if not wait_for_server("http://127.0.0.1:5000", max_attempts=5):
-            print("ERROR: Backend server did not start properly.")
-            return False
-        
-        print("Backend server is running")
-        return True
-    
-    except Exception as e:
-        print(f"ERROR: Failed to start backend server: {e}")
-        return False
+    from project_runner import servers
+    return servers.start_backend(processes)
 
 def start_frontend():
     """Start the frontend development server.
@@ -132,49 +103,8 @@ def start_frontend():
     Returns:
         bool: True if server started successfully, False otherwise
     """
-    # Check if frontend directory exists
-    frontend_dir = os.path.join(os.path.dirname(__file__), 'frontend')
-    if not os.path.exists(frontend_dir):
-        print(f"ERROR: Frontend directory not found at {frontend_dir}")
-        return False
-    
-    if check_port_in_use(3000):
-        print("WARNING: Port 3000 is already in use. Frontend may not start correctly.")
-    
-    print("Starting frontend development server...")
-    
-    try:
-        # Try to find npm
-        npm_path = servers.find_npm_path()
-        if not npm_path:
-            print("ERROR: npm not found. Please ensure Node.js is installed and added to PATH.")
-            return False
-        
-        print(f"Found npm at: {npm_path}")
-        
-        # Start frontend server
-        process = subprocess.Popen(
-            [npm_path, "start"],
-            cwd=frontend_dir,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        # Add to processes list
-        processes.append(process)
-        
-        # Wait for server to become available
-        print("Waiting for frontend to be ready...")
-        if not wait_for_server("http://127.0.0.1:3000", max_attempts=5):
-            print("ERROR: Frontend server did not start properly.")
-            return False
-        
-        print("Frontend server is running")
-        return True
-    
-    except Exception as e:
-        print(f"ERROR: Failed to start frontend server: {e}")
-        return False
+    from project_runner import servers
+    return servers.start_frontend(processes)
 
 def start_simulation(config_file=None):
     """Start a drone simulation.
@@ -185,42 +115,22 @@ def start_simulation(config_file=None):
     Returns:
         bool: True if simulation started successfully, False otherwise
     """
-    result = servers.start_simulation(config_file, processes)
-    return result
+    from project_runner import servers
+    return servers.start_simulation(config_file, processes)
 
 def clean_up():
     """Clean up all processes."""
-    print("\nShutting down all processes...")
-    
-    for proc in processes:
-        if hasattr(proc, 'poll') and proc.poll() is None:
-            try:
-                # Try to terminate gracefully first
-                proc.terminate()
-                
-                # Give it a short time to terminate
-                for _ in range(5):  # Wait up to 0.5 seconds
-                    if proc.poll() is not None:
-                        break  # Process terminated successfully
-                    time.sleep(0.1)
-                
-                # If still running, kill it
-                if proc.poll() is None:
-                    print(f"Process {proc.pid if hasattr(proc, 'pid') else 'unknown'} did not terminate gracefully, killing")
-                    proc.kill()
-            except Exception as e:
-                print(f"Error terminating process: {e}")
-    
-    # Also delegate to process module's clean_up for any additional handling
-    # Import the process module to access its clean_up function
     from project_runner import process
     process.clean_up(processes)
 
 def main():
     """Main entry point."""
     args = parse_args()
+    from concurrent.futures import ThreadPoolExecutor
+    from project_runner import process
     
     # Register cleanup handler
+    atexit.register(clean_up)
     signal.signal(signal.SIGINT, lambda sig, frame: sys.exit(0))
     
     print("Starting Drone Simulation Project components")
@@ -233,25 +143,23 @@ def main():
         "simulation": False
     }
     
-    # Check PostgreSQL status
-    if not is_postgres_running():
-        if not start_postgres():
-            print("PostgreSQL could not be started. Database functionality may not work.")
-        else:
-            status["postgres"] = True
-    else:
-        print("PostgreSQL is already running")
-        status["postgres"] = True
-    
-    # Start backend if requested
-    if not args.no_backend:
-        status["backend"] = start_backend()
-    
-    # Start frontend if requested
-    if not args.no_frontend:
-        status["frontend"] = start_frontend()
-        if not status["frontend"]:
-            print("Frontend server failed to start.")
+    # Start PostgreSQL and the frontend concurrently so their readiness waits
+    # overlap. The backend creates its tables on startup, so it is only
+    # started once PostgreSQL is up; the simulation waits for the backend.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        postgres_future = executor.submit(ensure_postgres)
+        frontend_future = None if args.no_frontend else executor.submit(start_frontend)
+        try:
+            status["postgres"] = postgres_future.result()
+        except Exception as e:
+            print(f"Error starting PostgreSQL: {e}")
+        backend_future = None if args.no_backend else executor.submit(start_backend)
+        if backend_future is not None:
+            status["backend"] = backend_future.result()
+        if frontend_future is not None:
+            status["frontend"] = frontend_future.result()
+            if not status["frontend"]:
+                print("Frontend server failed to start.")
     
     # Start simulation if requested
     if args.simulation:
@@ -280,14 +188,13 @@ def main():
     
     # Keep the script running until interrupted
     try:
-        while True:
-            time.sleep(1)
-            # Check if all processes have exited
-            if not any(p.poll() is None for p in processes if hasattr(p, 'poll')):
-                print("All components have stopped. Exiting.")
-                break
+        # Sleep until a component exits rather than checking every second
+        while process.monitor_processes(processes):
+            process.wait_for_exit(processes)
+        print("All components have stopped. Exiting.")
     except KeyboardInterrupt:
-        clean_up()
+        # Cleanup will be handled by atexit
+        pass
     
     return 0
 
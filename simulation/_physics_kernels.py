@@ -0,0 +1,164 @@
+"""
+Scalar kernels behind DronePhysics.
+
+The functions take and return plain floats so Numba can compile them to
+native code. Numba is optional: without it they run as ordinary Python.
+"""
+import math
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Degree/radian conversion factors, so conversions are a multiply rather
+# than a call to math.radians/math.degrees
+RAD = math.pi / 180
+DEG = 180 / math.pi
+
+# Steps shorter than this (radians, about 64 m) use the flat-earth
+# approximation, away from the poles where cos(lat) drops below MIN_FLAT_COS_LAT
+# (about 87 degrees). Its error is about earth_radius * step**2 * tan(lat) / 2,
+# which keeps it under a centimeter within both limits
+SMALL_ANGLE = 1e-5
+MIN_FLAT_COS_LAT = 0.05
+
+def _jit(func):
+    """Compile func with Numba when it is installed"""
+    if njit is None:
+        return func
+    return njit(cache=True, fastmath=True)(func)
+
+@_jit
+def normalize_angle(angle):
+    """Normalize angle to be between 0-360 degrees"""
+    return (angle + 360) % 360
+
+@_jit
+def calculate_heading(lat1, lon1, lat2, lon2):
+    """Calculate heading in degrees from start to end point (all in degrees)"""
+    lat1, lon1 = lat1 * RAD, lon1 * RAD
+    lat2, lon2 = lat2 * RAD, lon2 * RAD
+    
+    dlon = lon2 - lon1
+    y = math.sin(dlon) * math.cos(lat2)
+    x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
+    
+    return normalize_angle(math.atan2(y, x) * DEG)
+
+@_jit
+def haversine_distance(lat1, lon1, lat2, lon2, earth_radius):
+    """Calculate distance between two coordinates (in degrees) in meters"""
+    lat1, lon1 = lat1 * RAD, lon1 * RAD
+    lat2, lon2 = lat2 * RAD, lon2 * RAD
+    
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    
+    return earth_radius * c
+
+@_jit
+def _heading_and_distance(lat_rad, sin_lat, cos_lat, lon_rad, target_lat, target_lon, earth_radius):
+    """Heading in degrees and distance in meters to a target, from a point given in radians"""
+    target_lat_rad = target_lat * RAD
+    sin_target_lat, cos_target_lat = math.sin(target_lat_rad), math.cos(target_lat_rad)
+    dlat = target_lat_rad - lat_rad
+    dlon = target_lon * RAD - lon_rad
+    
+    # Heading to target
+    y = math.sin(dlon) * cos_target_lat
+    x = cos_lat * sin_target_lat - sin_lat * cos_target_lat * math.cos(dlon)
+    heading = normalize_angle(math.atan2(y, x) * DEG)
+    
+    # Haversine distance to target
+    a = math.sin(dlat/2)**2 + cos_lat * cos_target_lat * math.sin(dlon/2)**2
+    distance = earth_radius * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    
+    return heading, distance
+
+@_jit
+def heading_and_distance(lat1, lon1, lat2, lon2, earth_radius):
+    """Calculate heading in degrees and distance in meters between two coordinates in one pass"""
+    lat_rad = lat1 * RAD
+    return _heading_and_distance(lat_rad, math.sin(lat_rad), math.cos(lat_rad), lon1 * RAD,
+                                 lat2, lon2, earth_radius)
+
+@_jit
+def _destination(lat_rad, sin_lat, cos_lat, lon_rad, sin_heading, cos_heading, angular_distance):
+    """Move from a point along a heading, all in radians, returning (lat, lon) in radians"""
+    # A tick moves the drone a few meters at most, well within the range where
+    # the equirectangular step is accurate to a centimeter (see SMALL_ANGLE)
+    if angular_distance < SMALL_ANGLE and cos_lat > MIN_FLAT_COS_LAT:
+        return (lat_rad + angular_distance * cos_heading,
+                lon_rad + angular_distance * sin_heading / cos_lat)
+    
+    sin_dist, cos_dist = math.sin(angular_distance), math.cos(angular_distance)
+    
+    # Calculate new latitude
+    sin_new_lat = sin_lat * cos_dist + cos_lat * sin_dist * cos_heading
+    new_lat_rad = math.asin(sin_new_lat)
+    
+    # Calculate new longitude
+    new_lon_rad = lon_rad + math.atan2(sin_heading * sin_dist * cos_lat,
+                                      cos_dist - sin_lat * sin_new_lat)
+    
+    return new_lat_rad, new_lon_rad
+
+@_jit
+def calculate_new_position(lat, lon, heading, distance, earth_radius):
+    """Calculate new (lat, lon) in degrees given distance and heading"""
+    lat_rad = lat * RAD
+    heading_rad = heading * RAD
+    
+    new_lat_rad, new_lon_rad = _destination(lat_rad, math.sin(lat_rad), math.cos(lat_rad), lon * RAD,
+                                            math.sin(heading_rad), math.cos(heading_rad),
+                                            distance / earth_radius)
+    
+    return new_lat_rad * DEG, new_lon_rad * DEG
+
+@_jit
+def update_physics(lat, lon, heading, velocity, target_lat, target_lon, delta_t,
+                   max_velocity, max_acceleration, max_deceleration,
+                   inertia_factor, turn_rate, earth_radius):
+    """Advance one drone by delta_t toward the target, returning (lat, lon, heading, velocity)"""
+    # Trig of the current position is shared by the heading, distance and new position
+    lat_rad, lon_rad = lat * RAD, lon * RAD
+    sin_lat, cos_lat = math.sin(lat_rad), math.cos(lat_rad)
+    target_heading, distance = _heading_and_distance(lat_rad, sin_lat, cos_lat, lon_rad,
+                                                     target_lat, target_lon, earth_radius)
+    
+    # Update heading based on turn rate and inertia, limited by the turn rate
+    heading_diff = normalize_angle(target_heading - heading)
+    max_turn = turn_rate * delta_t
+    actual_turn = max(-max_turn, min(heading_diff * (1.0 - inertia_factor), max_turn))
+    heading = normalize_angle(heading + actual_turn)
+    
+    # If close to target, begin decelerating
+    target_velocity = max_velocity
+    braking_distance = (velocity * velocity) / (2 * max_deceleration)
+    if distance < braking_distance:
+        target_velocity = velocity * (distance / braking_distance)
+    
+    # Apply acceleration with inertia factor, limited per step
+    max_accel_change = max_acceleration * delta_t
+    actual_accel = max(-max_accel_change, min((target_velocity - velocity) * (1.0 - inertia_factor), max_accel_change))
+    velocity = max(0.0, min(velocity + actual_accel, max_velocity))
+    
+    # Calculate new position
+    if velocity > 0:
+        heading_rad = heading * RAD
+        new_lat_rad, new_lon_rad = _destination(lat_rad, sin_lat, cos_lat, lon_rad,
+                                                math.sin(heading_rad), math.cos(heading_rad),
+                                                velocity * delta_t / earth_radius)
+        lat, lon = new_lat_rad * DEG, new_lon_rad * DEG
+    
+    return lat, lon, heading, velocity
+
+if njit is not None:
+    # Compile now rather than on the simulator's first tick. The arguments
+    # are all floats, as DronePhysics passes them, so this is the
+    # specialization the simulator uses rather than an extra one
+    update_physics(51.5, -0.1, 0.0, 0.0, 51.6, -0.1, 0.1, 10.0, 2.0, 3.0, 0.8, 45.0, 6371000.0)
@@ -1,5 +1,5 @@
-import math
 import time
+from simulation import _physics_kernels as kernels
 
 class DronePhysics:
     """
@@ -24,130 +24,81 @@ class DronePhysics:
         self.turn_rate = 45.0  # maximum degrees per second the drone can turn
         
         # Earth radius (meters) for coordinate calculations
-        self.earth_radius = 6371000
+        self.earth_radius = 6371000.0
         
         # Timing for physics calculations
         self.last_update_time = time.time()
         
-    def update_physics(self, target_position=None):
+    def update_physics(self, target_position=None, dt=None):
         """
         Update drone position, velocity, etc. based on physics.
         
         Args:
             target_position: (latitude, longitude) tuple if moving toward a waypoint
+            dt: Time step in seconds; if None, the time since the last update is used
             
         Returns:
             current_position: (latitude, longitude) tuple
         """
-        # Calculate time delta
-        current_time = time.time()
-        delta_t = current_time - self.last_update_time
-        self.last_update_time = current_time
+        if dt is None:
+            # Calculate time delta
+            current_time = time.time()
+            dt = current_time - self.last_update_time
+            self.last_update_time = current_time
         
         # If no target, maintain current state
         if target_position is None:
             return self.position
             
-        # Calculate heading to target
-        target_heading = self._calculate_heading(self.position, target_position)
-        distance = self._haversine_distance(self.position, target_position)
+        return self.update_physics_n(target_position, dt, 1)
         
-        # Update heading based on turn rate and inertia
-        heading_diff = self._normalize_angle(target_heading - self.heading)
-        max_turn = self.turn_rate * delta_t
-        actual_turn = heading_diff * (1.0 - self.inertia_factor)
-        
-        # Limit turn based on maximum turn rate
-        if abs(actual_turn) > max_turn:
-            actual_turn = max_turn if actual_turn > 0 else -max_turn
-            
-        # Update heading
-        self.heading = self._normalize_angle(self.heading + actual_turn)
-        
-        # Update acceleration based on distance to target
-        target_velocity = self.max_velocity
-        
-        # If close to target, begin decelerating
-        braking_distance = (self.velocity * self.velocity) / (2 * self.max_deceleration)
-        if distance < braking_distance:
-            target_velocity = self.velocity * (distance / braking_distance)
-        
-        # Apply acceleration with inertia factor
-        velocity_diff = target_velocity - self.velocity
-        max_accel_change = self.max_acceleration * delta_t
-        actual_accel = velocity_diff * (1.0 - self.inertia_factor)
+    def update_physics_n(self, target_position, dt, steps):
+        """
+        Advance the physics by a number of fixed time steps toward a target.
         
-        # Limit acceleration change
-        if abs(actual_accel) > max_accel_change:
-            actual_accel = max_accel_change if actual_accel > 0 else -max_accel_change
+        Args:
+            target_position: (latitude, longitude) tuple of the waypoint
+            dt: Time step in seconds
+            steps: Number of steps to take
             
-        # Update velocity
-        self.velocity += actual_accel
-        self.velocity = max(0.0, min(self.velocity, self.max_velocity))
-        
-        # Calculate new position
-        if self.velocity > 0:
-            distance_moved = self.velocity * delta_t
-            new_position = self._calculate_new_position(distance_moved)
-            self.position = new_position
+        Returns:
+            current_position: (latitude, longitude) tuple
+        """
+        lat, lon = self.position
+        heading, velocity = self.heading, self.velocity
+        target_lat, target_lon = target_position
+        for _ in range(steps):
+            lat, lon, heading, velocity = kernels.update_physics(
+                lat, lon, heading, velocity, target_lat, target_lon, dt,
+                self.max_velocity, self.max_acceleration, self.max_deceleration,
+                self.inertia_factor, self.turn_rate, self.earth_radius
+            )
+        self.position = (lat, lon)
+        self.heading, self.velocity = heading, velocity
         
         return self.position
         
     def _calculate_heading(self, start_pos, end_pos):
         """Calculate heading in degrees from start to end point"""
-        lat1, lon1 = math.radians(start_pos[0]), math.radians(start_pos[1])
-        lat2, lon2 = math.radians(end_pos[0]), math.radians(end_pos[1])
-        
-        dlon = lon2 - lon1
-        y = math.sin(dlon) * math.cos(lat2)
-        x = math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dlon)
-        
-        heading = math.atan2(y, x)
-        heading = math.degrees(heading)
-        heading = (heading + 360) % 360  # Normalize to 0-360
-        
-        return heading
+        return kernels.calculate_heading(start_pos[0], start_pos[1], end_pos[0], end_pos[1])
         
     def _haversine_distance(self, point1, point2):
         """Calculate distance between two coordinates in meters"""
-        lat1, lon1 = math.radians(point1[0]), math.radians(point1[1])
-        lat2, lon2 = math.radians(point2[0]), math.radians(point2[1])
+        return kernels.haversine_distance(point1[0], point1[1], point2[0], point2[1], self.earth_radius)
         
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-        
-        return self.earth_radius * c
+    def _heading_and_distance(self, start_pos, end_pos):
+        """Calculate heading in degrees and distance in meters from start to end point in one pass"""
+        return kernels.heading_and_distance(start_pos[0], start_pos[1], end_pos[0], end_pos[1],
+                                            self.earth_radius)
         
     def _calculate_new_position(self, distance):
         """Calculate new position given distance and heading"""
-        lat, lon = self.position
-        lat_rad = math.radians(lat)
-        lon_rad = math.radians(lon)
-        heading_rad = math.radians(self.heading)
-        
-        # Convert distance to angular distance in radians
-        angular_distance = distance / self.earth_radius
-        
-        # Calculate new latitude
-        new_lat_rad = math.asin(math.sin(lat_rad) * math.cos(angular_distance) + 
-                               math.cos(lat_rad) * math.sin(angular_distance) * math.cos(heading_rad))
-        
-        # Calculate new longitude
-        new_lon_rad = lon_rad + math.atan2(math.sin(heading_rad) * math.sin(angular_distance) * math.cos(lat_rad),
-                                          math.cos(angular_distance) - math.sin(lat_rad) * math.sin(new_lat_rad))
-        
-        # Convert back to degrees
-        new_lat = math.degrees(new_lat_rad)
-        new_lon = math.degrees(new_lon_rad)
-        
-        return (new_lat, new_lon)
+        return kernels.calculate_new_position(self.position[0], self.position[1], self.heading,
+                                              distance, self.earth_radius)
         
     def _normalize_angle(self, angle):
         """Normalize angle to be between 0-360 degrees"""
-        return (angle + 360) % 360
+        return kernels.normalize_angle(angle)
         
     def set_position(self, position, altitude=None):
         """Set the drone's current position"""
@@ -1,18 +1,37 @@
 import time
 import random
-import json
+import orjson
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import sys
 from datetime import datetime
 from simulation.drone_physics import DronePhysics
 import argparse
+import glob
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Seconds to wait for the API before giving up on a request
+REQUEST_TIMEOUT = 10
+
+# Most samples that may be waiting to be sent before the simulation blocks
+MAX_PENDING_SENDS = 16
+
+# Request bodies are encoded with orjson and sent as raw bytes
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Sensor noise is drawn this many readings at a time during a simulation
+NOISE_BLOCK_SIZE = 256
 
 class DroneSimulator:
     def __init__(self, api_url="http://localhost:5000", config=None):
         # Default configuration
         self.config = {
             "simulation_speed": 1.0,  # Speed multiplier (1.0 = normal, 2.0 = 2x speed, etc.)
+            "batch_size": 8,          # Samples sent per POST (1 = one POST per sample)
+            "random_seed": None,      # Seed for sensor noise, None for a different run each time
             "waypoint_file": None,    # Path to a JSON file with waypoints, if None use default
             "sensor_noise_levels": {
                 "temperature": 5.0,   # Temperature noise level in °C (+/-)
@@ -36,8 +55,8 @@ class DroneSimulator:
         # Load waypoints from file if specified
         if self.config["waypoint_file"] and os.path.exists(self.config["waypoint_file"]):
             try:
-                with open(self.config["waypoint_file"], 'r') as f:
-                    self.waypoints = json.load(f)
+                with open(self.config["waypoint_file"], 'rb') as f:
+                    self.waypoints = orjson.loads(f.read())
                 print(f"Loaded {len(self.waypoints)} waypoints from {self.config['waypoint_file']}")
             except Exception as e:
                 print(f"Error loading waypoints from file: {e}")
@@ -48,6 +67,27 @@ class DroneSimulator:
         self.api_url = api_url
         self.flight_id = None
         
+        # One session for all API calls so the connection is kept alive
+        # between samples instead of reconnecting for each one
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Samples are posted from a background thread so the simulation never
+        # waits on the API; at most MAX_PENDING_SENDS are queued or in flight.
+        # A single sender keeps them in order, since the backend orders a
+        # flight's positions by the order they were inserted
+        self._sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drone-sender")
+        self._send_slots = threading.BoundedSemaphore(MAX_PENDING_SENDS)
+        self._pending = []
+        
+        # Samples waiting to be sent together as one batch
+        self._buffer = []
+        
+        # Random generator for batched sensor noise
+        self._rng = np.random.default_rng(self.config["random_seed"])
+        
         # Initialize physics engine
         self.physics = DronePhysics()
         
@@ -60,13 +100,42 @@ class DroneSimulator:
             if "inertia_factor" in self.config["physics"]:
                 self.physics.inertia_factor = self.config["physics"]["inertia_factor"]
     
+    @property
+    def flight_id(self):
+        """ID of the current flight in the API"""
+        return self._flight_id
+    
+    @flight_id.setter
+    def flight_id(self, flight_id):
+        # Build the per-flight URLs once rather than on every sample
+        self._flight_id = flight_id
+        flight_url = f"{self.api_url}/api/flights/{flight_id}"
+        self._end_url = f"{flight_url}/end"
+        self._log_url = f"{flight_url}/log_data"
+        self._batch_url = f"{flight_url}/log_data/batch"
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Wait for queued samples, then close the HTTP session and its pooled connections"""
+        self._sender.shutdown(wait=True)
+        self.session.close()
+    
     def _deep_update(self, d, u):
         """Deep update dictionary d with values from dictionary u"""
-        for k, v in u.items():
-            if isinstance(v, dict) and k in d and isinstance(d[k], dict):
-                self._deep_update(d[k], v)
-            else:
-                d[k] = v
+        # Nested dictionaries are merged from an explicit stack rather than by recursion
+        stack = [(d, u)]
+        while stack:
+            d, u = stack.pop()
+            for k, v in u.items():
+                if isinstance(v, dict) and k in d and isinstance(d[k], dict):
+                    stack.append((d[k], v))
+                else:
+                    d[k] = v
     
     def _set_default_waypoints(self):
         """Set default waypoints if not loaded from file"""
@@ -81,27 +150,42 @@ class DroneSimulator:
             (51.507351, -0.127758),  # Return to start
         ]
         
-    def generate_sensor_reading(self, position, altitude=None):
-        """Generate mock sensor data for the current position"""
-        lat, lon = position
-        
-        # Use noise levels from config
+    def precompute_sensor_noise(self, n):
+        """Draw sensor noise for n readings at once, as rows of (altitude, temperature, humidity, AQI)"""
         temp_noise = self.config["sensor_noise_levels"]["temperature"]
         humidity_noise = self.config["sensor_noise_levels"]["humidity"]
         aqi_noise = self.config["sensor_noise_levels"]["air_quality"]
         alt_noise = self.config["sensor_noise_levels"]["altitude"]
         
+        low = [-alt_noise, -temp_noise, -humidity_noise, -aqi_noise/2]
+        high = [alt_noise, temp_noise, humidity_noise, aqi_noise]
+        return self._rng.uniform(low, high, size=(n, 4))
+    
+    def generate_sensor_reading(self, position, altitude=None, noise=None):
+        """Generate mock sensor data for the current position, optionally from a precomputed noise row"""
+        lat, lon = position
+        
+        if noise is None:
+            # Use noise levels from config
+            temp_noise = self.config["sensor_noise_levels"]["temperature"]
+            humidity_noise = self.config["sensor_noise_levels"]["humidity"]
+            aqi_noise = self.config["sensor_noise_levels"]["air_quality"]
+            alt_noise = self.config["sensor_noise_levels"]["altitude"]
+            noise = (random.uniform(-alt_noise, alt_noise), random.uniform(-temp_noise, temp_noise),
+                     random.uniform(-humidity_noise, humidity_noise), random.uniform(-aqi_noise/2, aqi_noise))
+        alt_offset, temp_offset, humidity_offset, aqi_offset = map(float, noise)
+        
         # Use altitude from physics if not provided
         if altitude is None:
             altitude = self.physics.altitude
             
         # Add noise to altitude
-        altitude = round(altitude + random.uniform(-alt_noise, alt_noise), 1)
+        altitude = round(altitude + alt_offset, 1)
         
         # Generate realistic but random sensor values
-        temperature = round(20 + random.uniform(-temp_noise, temp_noise), 1)  # Around 20°C
-        humidity = round(60 + random.uniform(-humidity_noise, humidity_noise), 1)   # Around 60%
-        air_quality_index = round(50 + random.uniform(-aqi_noise/2, aqi_noise), 0)  # AQI (0-500)
+        temperature = round(20 + temp_offset, 1)  # Around 20°C
+        humidity = round(60 + humidity_offset, 1)   # Around 60%
+        air_quality_index = round(50 + aqi_offset, 0)  # AQI (0-500)
         
         # Get additional telemetry data from physics
         telemetry = self.physics.get_telemetry()
@@ -122,12 +206,45 @@ class DroneSimulator:
         
         return reading
     
+    def generate_sensor_block(self, positions, altitude=None):
+        """Generate mock sensor data for many positions at once, e.g. to replay a recorded track"""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        
+        # Use altitude from physics if not provided
+        if altitude is None:
+            altitude = self.physics.altitude
+        
+        # Add noise to the base altitude, temperature, humidity and AQI in one pass
+        values = np.array([altitude, 20, 60, 50]) + self.precompute_sensor_noise(len(positions))
+        values[:, :3] = np.round(values[:, :3], 1)
+        values[:, 3] = np.round(values[:, 3], 0)
+        
+        telemetry = self.physics.get_telemetry()
+        timestamp = datetime.now().isoformat()
+        
+        return [
+            {
+                "timestamp": timestamp,
+                "latitude": lat,
+                "longitude": lon,
+                "altitude": alt,
+                "temperature": temperature,
+                "humidity": humidity,
+                "air_quality_index": air_quality_index,
+                "velocity": telemetry["velocity"],
+                "heading": telemetry["heading"],
+                "acceleration": telemetry["acceleration"]
+            }
+            for (lat, lon), (alt, temperature, humidity, air_quality_index)
+            in zip(positions.tolist(), values.tolist())
+        ]
+    
     def start_flight(self):
         """Start a new flight in the API"""
         try:
-            response = requests.post(f"{self.api_url}/api/flights/start")
+            response = self.session.post(f"{self.api_url}/api/flights/start", timeout=REQUEST_TIMEOUT)
             if response.status_code == 201:
-                self.flight_id = response.json()['flight_id']
+                self.flight_id = orjson.loads(response.content)['flight_id']
                 print(f"Started new flight with ID: {self.flight_id}")
                 return self.flight_id
             else:
@@ -137,14 +254,51 @@ class DroneSimulator:
             print(f"Error connecting to API: {e}")
             return None
             
+    def buffer_sample(self, data):
+        """Add sensor data to the current batch, sending the batch once it is full"""
+        self._buffer.append(data)
+        if len(self._buffer) >= self.config["batch_size"]:
+            self.flush_samples()
+    
+    def flush_samples(self):
+        """Send the buffered samples in the background"""
+        if not self._buffer:
+            return
+        samples, self._buffer = self._buffer, []
+        if len(samples) == 1:
+            self.send_data_in_background(samples[0])
+        else:
+            self._send_in_background(self.send_batch_to_api, samples)
+    
+    def send_data_in_background(self, data):
+        """Queue sensor data to be sent to the API without waiting for the response"""
+        self._send_in_background(self.send_data_to_api, data)
+    
+    def _send_in_background(self, send, payload):
+        """Run send(payload) on the sender thread"""
+        # Block if the API has fallen too far behind rather than queueing without bound
+        self._send_slots.acquire()
+        future = self._sender.submit(send, payload)
+        future.add_done_callback(lambda _: self._send_slots.release())
+        self._pending.append(future)
+    
+    def wait_for_pending_sends(self):
+        """Wait until every queued sample has been sent"""
+        wait(self._pending)
+        self._pending.clear()
+    
     def end_flight(self):
         """End the current flight in the API"""
+        # Let buffered and queued samples reach the API before the flight is closed
+        self.flush_samples()
+        self.wait_for_pending_sends()
+        
         if not self.flight_id:
             print("No active flight to end")
             return False
             
         try:
-            response = requests.post(f"{self.api_url}/api/flights/{self.flight_id}/end")
+            response = self.session.post(self._end_url, timeout=REQUEST_TIMEOUT)
             if response.status_code == 200:
                 print(f"Ended flight {self.flight_id}")
                 return True
@@ -162,16 +316,51 @@ class DroneSimulator:
             return False
             
         try:
-            response = requests.post(
-                f"{self.api_url}/api/flights/{self.flight_id}/log_data", 
-                json=data
+            response = self.session.post(
+                self._log_url,
+                data=orjson.dumps(data),
+                headers=JSON_HEADERS,
+                timeout=REQUEST_TIMEOUT
             )
             
             if response.status_code == 201:
-                result = response.json()
-                anomaly_status = "ANOMALY DETECTED!" if result.get('is_anomaly', False) else "normal"
+                # The anomaly verdict comes in a header, so the body is never decoded
+                anomaly_status = "ANOMALY DETECTED!" if response.headers.get("X-Anomaly") == "1" else "normal"
                 print(f"Data sent successfully. Status: {anomaly_status}")
                 return True
+            elif response.status_code == 202:
+                # Backend is running with asynchronous ingest
+                print("Data queued for ingest.")
+                return True
+            else:
+                print(f"Error sending data: {response.text}")
+                return False
+        except requests.RequestException as e:
+            print(f"Error connecting to API: {e}")
+            return False
+    
+    def send_batch_to_api(self, samples):
+        """Send a batch of sensor data to the API in one request"""
+        if not self.flight_id:
+            print("No active flight ID. Data not sent.")
+            return False
+            
+        try:
+            response = self.session.post(
+                self._batch_url,
+                data=orjson.dumps({"samples": samples}),
+                headers=JSON_HEADERS,
+                timeout=REQUEST_TIMEOUT
+            )
+            
+            if response.status_code == 201:
+                anomalies = int(response.headers.get("X-Anomaly-Count", 0))
+                print(f"Batch of {len(samples)} samples sent successfully. Anomalies: {anomalies}")
+                return True
+            elif response.status_code == 202:
+                # Backend is running with asynchronous ingest
+                print(f"Batch of {len(samples)} samples queued for ingest.")
+                return True
             else:
                 print(f"Error sending data: {response.text}")
                 return False
@@ -196,58 +385,75 @@ class DroneSimulator:
         if self.waypoints:
             self.physics.set_position(self.waypoints[0])
             
-        # Start with first waypoint
-        current_waypoint_idx = 0
-        
         # Define waypoint arrival threshold in meters
         waypoint_threshold = 10.0
         
-        # Main simulation loop
-        simulation_running = True
-        while simulation_running and current_waypoint_idx < len(self.waypoints):
-            # Get current target waypoint
-            target_waypoint = self.waypoints[current_waypoint_idx]
-            
-            # Update physics with current target
-            use_physics = self.config["physics"]["enable_physics"]
-            
-            if use_physics:
-                # Update drone position using physics engine
-                current_position = self.physics.update_physics(target_waypoint)
+        # Physics advances by one fixed step per tick rather than by however
+        # much wall-clock time the previous tick happened to take
+        wait_time = 1.0 / self.config["simulation_speed"]
+        
+        # The number of ticks is not known up front, so noise is drawn in blocks
+        noise = self.precompute_sensor_noise(NOISE_BLOCK_SIZE)
+        tick = 0
+        
+        # Look up settings and methods once rather than on every tick
+        use_physics = self.config["physics"]["enable_physics"]
+        waypoints = self.waypoints
+        waypoint_count = len(waypoints)
+        update_physics = self.physics.update_physics
+        haversine_distance = self.physics._haversine_distance
+        
+        # Ticks are scheduled against the monotonic clock so the time spent
+        # on a tick comes out of its wait instead of adding to it
+        deadline = time.monotonic()
+        
+        # Main simulation loop: fly to each waypoint in turn, one tick at a time
+        for waypoint_number, target_waypoint in enumerate(waypoints, 1):
+            reached = False
+            while not reached:
+                if use_physics:
+                    # Update drone position using physics engine
+                    current_position = update_physics(target_waypoint, dt=wait_time)
+                    
+                    # Check if we've reached the waypoint
+                    reached = haversine_distance(current_position, target_waypoint) < waypoint_threshold
+                    if reached:
+                        print(f"Reached waypoint {waypoint_number}/{waypoint_count}")
+                else:
+                    # Simple waypoint movement without physics
+                    current_position = target_waypoint
+                    print(f"Moving to waypoint {waypoint_number}/{waypoint_count}: {target_waypoint}")
+                    reached = True
                 
-                # Check if we've reached the waypoint
-                distance = self.physics._haversine_distance(current_position, target_waypoint)
-                if distance < waypoint_threshold:
-                    print(f"Reached waypoint {current_waypoint_idx+1}/{len(self.waypoints)}")
-                    current_waypoint_idx += 1
-            else:
-                # Simple waypoint movement without physics
-                current_position = target_waypoint
-                print(f"Moving to waypoint {current_waypoint_idx+1}/{len(self.waypoints)}: {target_waypoint}")
-                current_waypoint_idx += 1
-            
-            # Generate sensor reading at current position
-            sensor_data = self.generate_sensor_reading(current_position)
-            flight_data.append(sensor_data)
-            
-            # Print sensor data
-            print(f"Sensor readings: Temp: {sensor_data['temperature']}°C, " 
-                  f"Humidity: {sensor_data['humidity']}%, " 
-                  f"AQI: {sensor_data['air_quality_index']}, "
-                  f"Velocity: {sensor_data['velocity']:.1f} m/s")
-            
-            # Send data to API
-            self.send_data_to_api(sensor_data)
-            
-            # Wait based on simulation speed
-            wait_time = 1.0 / self.config["simulation_speed"]
-            time.sleep(wait_time)
-            
-            # Break at end of waypoints
-            if current_waypoint_idx >= len(self.waypoints):
-                simulation_running = False
+                # Generate sensor reading at current position
+                if tick == len(noise):
+                    noise = self.precompute_sensor_noise(NOISE_BLOCK_SIZE)
+                    tick = 0
+                sensor_data = self.generate_sensor_reading(current_position, noise=noise[tick])
+                tick += 1
+                flight_data.append(sensor_data)
+                
+                # Print sensor data
+                print(f"Sensor readings: Temp: {sensor_data['temperature']}°C, " 
+                      f"Humidity: {sensor_data['humidity']}%, " 
+                      f"AQI: {sensor_data['air_quality_index']}, "
+                      f"Velocity: {sensor_data['velocity']:.1f} m/s")
+                
+                # Send data to API in batches, in the background so the
+                # simulation keeps its cadence whatever the API latency
+                self.buffer_sample(sensor_data)
+                
+                # Wait until the next tick is due based on simulation speed
+                deadline += wait_time
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                elif remaining < -wait_time:
+                    # More than a tick behind (e.g. the API stalled), so carry
+                    # on from now rather than rushing through the missed ticks
+                    deadline = time.monotonic()
         
-        # End the flight
+        # Ending the flight first lets buffered and queued samples reach the API
         self.end_flight()
         
         print("Simulation complete!")
@@ -257,8 +463,8 @@ def load_config_from_file(file_path):
     """Load configuration from a JSON file"""
     try:
         if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                return json.load(f)
+            with open(file_path, 'rb') as f:
+                return orjson.loads(f.read())
         else:
             print(f"Config file not found: {file_path}")
             return None
@@ -266,14 +472,44 @@ def load_config_from_file(file_path):
         print(f"Error loading config file: {e}")
         return None
 
+def run_simulation(api_url, config):
+    """Run one simulated flight and return its flight data"""
+    with DroneSimulator(api_url=api_url, config=config) as simulator:
+        return simulator.simulate_path()
+
+def run_sweep(api_url, configs, max_workers=None):
+    """Run one simulated flight per configuration in parallel, each in its own process"""
+    max_workers = max_workers or min(len(configs), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(run_simulation, [api_url] * len(configs), configs))
+
 if __name__ == "__main__":
     # Set up command line argument parsing
     parser = argparse.ArgumentParser(description='Drone Simulator with Physics Engine')
     parser.add_argument('--config', type=str, help='Path to a JSON configuration file')
     parser.add_argument('--speed', type=float, help='Simulation speed multiplier (e.g., 2.0 for 2x speed)')
     parser.add_argument('--api-url', type=str, default='http://localhost:5000', help='URL of the backend API')
+    parser.add_argument('--sweep', type=str, metavar='CONFIG_GLOB',
+                        help='Run one flight per JSON configuration file matching the pattern, in parallel')
     args = parser.parse_args()
     
+    if args.sweep:
+        config_files = sorted(glob.glob(args.sweep))
+        if not config_files:
+            print(f"No configuration files match: {args.sweep}")
+            sys.exit(1)
+        configs = [load_config_from_file(path) or {} for path in config_files]
+        if args.speed:
+            for config in configs:
+                config["simulation_speed"] = args.speed
+        print(f"Running {len(configs)} simulations from: {args.sweep}")
+        results = run_sweep(args.api_url, configs)
+        
+        # Output the collected data of every flight as JSON, keyed by configuration file
+        print("\nFlight Data JSON:")
+        print(orjson.dumps(dict(zip(config_files, results)), option=orjson.OPT_INDENT_2).decode())
+        sys.exit(0)
+    
     # Load configuration
     config = None
     if args.config:
@@ -305,9 +541,8 @@ if __name__ == "__main__":
         print(f"Overriding simulation speed to: {args.speed}x")
     
     # Create and run simulation with config
-    simulator = DroneSimulator(api_url=args.api_url, config=config)
-    flight_data = simulator.simulate_path()
+    flight_data = run_simulation(args.api_url, config)
     
     # Output the collected data as JSON
     print("\nFlight Data JSON:")
-    print(json.dumps(flight_data, indent=2)) 
\ No newline at end of file
+    print(orjson.dumps(flight_data, option=orjson.OPT_INDENT_2).decode()) 
\ No newline at end of file
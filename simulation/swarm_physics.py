@@ -0,0 +1,101 @@
+import numpy as np
+
+TWO_PI = 2 * np.pi
+
+class SwarmPhysics:
+    """
+    Vectorised drone physics for a whole swarm at once.
+    
+    Applies the same movement model as DronePhysics, but keeps the state of
+    every drone in NumPy arrays (one element per drone) so a single update
+    steps the entire swarm without a Python loop over drones.
+    Angles are kept in radians internally.
+    """
+    def __init__(self, positions, altitude=100.0):
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        count = len(positions)
+        
+        # Current swarm state
+        self.lat = np.radians(positions[:, 0])  # radians
+        self.lon = np.radians(positions[:, 1])  # radians
+        self.altitude = np.full(count, altitude, dtype=np.float64)  # meters
+        self.velocity = np.zeros(count)  # meters per second
+        self.heading = np.zeros(count)  # radians (0 = North, pi/2 = East)
+        self.acceleration = np.zeros(count)  # meters per second^2
+        
+        # Drone movement physics parameters (shared by the swarm)
+        self.max_velocity = 10.0  # m/s - maximum drone speed
+        self.max_acceleration = 2.0  # m/s² - maximum acceleration
+        self.max_deceleration = 3.0  # m/s² - maximum braking deceleration
+        self.inertia_factor = 0.8  # 0-1, higher means more resistance to change
+        self.turn_rate = 45.0  # maximum degrees per second the drone can turn
+        
+        # Earth radius (meters) for coordinate calculations
+        self.earth_radius = 6371000.0
+    
+    def __len__(self):
+        return len(self.lat)
+    
+    @property
+    def positions(self):
+        """Current (latitude, longitude) of every drone in degrees, shape (n, 2)"""
+        return np.column_stack((np.degrees(self.lat), np.degrees(self.lon)))
+    
+    def update_physics(self, targets, dt):
+        """
+        Move every drone toward its target.
+        
+        Args:
+            targets: (latitude, longitude) pairs in degrees, one per drone
+            dt: Time step in seconds
+        
+        Returns:
+            positions: (n, 2) array of (latitude, longitude) in degrees
+        """
+        targets = np.radians(np.asarray(targets, dtype=np.float64).reshape(-1, 2))
+        target_lat, target_lon = targets[:, 0], targets[:, 1]
+        
+        # Trig of both endpoints is shared by the heading and distance
+        sin_lat, cos_lat = np.sin(self.lat), np.cos(self.lat)
+        sin_target_lat, cos_target_lat = np.sin(target_lat), np.cos(target_lat)
+        dlat = target_lat - self.lat
+        dlon = target_lon - self.lon
+        
+        # Heading to target
+        y = np.sin(dlon) * cos_target_lat
+        x = cos_lat * sin_target_lat - sin_lat * cos_target_lat * np.cos(dlon)
+        target_heading = np.arctan2(y, x) % TWO_PI
+        
+        # Haversine distance to target
+        a = np.sin(dlat * 0.5) ** 2 + cos_lat * cos_target_lat * np.sin(dlon * 0.5) ** 2
+        distance = self.earth_radius * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        
+        # Update heading based on turn rate and inertia
+        heading_diff = (target_heading - self.heading) % TWO_PI
+        max_turn = np.radians(self.turn_rate) * dt
+        actual_turn = np.clip(heading_diff * (1.0 - self.inertia_factor), -max_turn, max_turn)
+        self.heading = (self.heading + actual_turn) % TWO_PI
+        
+        # If close to target, begin decelerating
+        braking_distance = (self.velocity * self.velocity) / (2 * self.max_deceleration)
+        braking = distance < braking_distance
+        target_velocity = np.full(len(self), self.max_velocity)
+        target_velocity[braking] = self.velocity[braking] * (distance[braking] / braking_distance[braking])
+        
+        # Apply acceleration with inertia factor, limited per step
+        max_accel_change = self.max_acceleration * dt
+        actual_accel = np.clip((target_velocity - self.velocity) * (1.0 - self.inertia_factor),
+                               -max_accel_change, max_accel_change)
+        self.velocity = np.clip(self.velocity + actual_accel, 0.0, self.max_velocity)
+        
+        # Calculate new positions for drones that are moving
+        moving = self.velocity > 0
+        angular_distance = self.velocity * dt / self.earth_radius
+        sin_dist, cos_dist = np.sin(angular_distance), np.cos(angular_distance)
+        new_lat = np.arcsin(sin_lat * cos_dist + cos_lat * sin_dist * np.cos(self.heading))
+        new_lon = self.lon + np.arctan2(np.sin(self.heading) * sin_dist * cos_lat,
+                                        cos_dist - sin_lat * np.sin(new_lat))
+        self.lat = np.where(moving, new_lat, self.lat)
+        self.lon = np.where(moving, new_lon, self.lon)
+        
+        return self.positions
@@ -1,5 +1,6 @@
 import pytest
 import time
+from simulation import _physics_kernels as kernels
 from simulation.drone_physics import DronePhysics
 
 @pytest.fixture
@@ -20,6 +21,13 @@ def test_initialisation():
     assert hasattr(physics, 'max_velocity')
     assert hasattr(physics, 'max_acceleration')
     assert hasattr(physics, 'inertia_factor')
+
+def test_kernel_parameters_are_floats():
+    """Test that the parameters passed to the kernels match the warm-up's float types."""
+    physics = DronePhysics()
+    for name in ('max_velocity', 'max_acceleration', 'max_deceleration',
+                 'inertia_factor', 'turn_rate', 'earth_radius'):
+        assert type(getattr(physics, name)) is float, name
         
 def test_heading_calculation(physics):
     """Test heading calculation between two points."""
@@ -56,11 +64,8 @@ def test_physics_update_with_target(physics):
     # Set a target position 100m north
     target = (51.508251, -0.127758)
     
-    # Force a longer time delta for testing
-    physics.last_update_time = time.time() - 1.0
-    
-    # Update physics
-    physics.update_physics(target)
+    # Update physics with a one second time step
+    physics.update_physics(target, dt=1.0)
     
     # Verify drone has started moving toward target
     assert physics.position != (51.507351, -0.127758)
@@ -85,13 +90,9 @@ def test_inertia_factor():
     # Set a target position
     target = (51.508251, -0.127758)  # North
     
-    # Force a longer time delta for testing
-    high_inertia.last_update_time = time.time() - 1.0
-    low_inertia.last_update_time = time.time() - 1.0
-    
-    # Update both physics instances once with a significant time delta
-    high_inertia.update_physics(target)
-    low_inertia.update_physics(target)
+    # Update both physics instances once with a significant time step
+    high_inertia.update_physics(target, dt=1.0)
+    low_inertia.update_physics(target, dt=1.0)
     
     # The drone with lower inertia should have moved further and faster
     assert low_inertia.velocity > high_inertia.velocity
@@ -105,11 +106,8 @@ def test_velocity_limits(physics):
     # Set a target far away
     target = (52.0, -0.127758)  # Far north
     
-    # Force a longer time delta for testing
-    physics.last_update_time = time.time() - 3.0
-    
-    # Update physics
-    physics.update_physics(target)
+    # Update physics with a long time step
+    physics.update_physics(target, dt=3.0)
     
     # Verify velocity does not exceed max
     assert physics.velocity <= 5.0
@@ -131,11 +129,8 @@ def test_zero_distance_update(physics):
     # Target is same as current position
     target = (51.507351, -0.127758)
     
-    # Force a time delta
-    physics.last_update_time = time.time() - 1.0
-    
-    # Update physics
-    physics.update_physics(target)
+    # Update physics with a one second time step
+    physics.update_physics(target, dt=1.0)
     
     # Drone should start decelerating when at target
     assert physics.velocity < 5.0
@@ -177,10 +172,9 @@ def test_heading_change(physics):
     # Store initial heading for comparison
     initial_heading = physics.heading
     
-    # Force multiple time deltas and updates to adjust heading
+    # Several half-second updates to adjust heading
     for _ in range(10):  # Increased from 5 to 10 updates
-        physics.last_update_time = time.time() - 0.5
-        physics.update_physics(target)
+        physics.update_physics(target, dt=0.5)
     
     # After updates, heading should have moved from 0 (north) toward 90 (east)
     # We don't expect it to reach exactly 90 degrees, but it should have moved significantly
@@ -200,16 +194,12 @@ def test_physics_movement(physics):
     # Target position (northeast)
     target = (51.508351, -0.126758)
     
-    # Force a longer time delta for testing
-    physics.last_update_time = time.time() - 1.0
-    
     # Initial position
     initial_lat, initial_lon = physics.position
     
-    # Update physics multiple times
+    # Update physics multiple times with half-second steps
     for _ in range(5):
-        physics.last_update_time = time.time() - 0.5
-        physics.update_physics(target)
+        physics.update_physics(target, dt=0.5)
     
     # After updates, position should have changed
     final_lat, final_lon = physics.position
@@ -260,4 +250,51 @@ def test_deceleration(physics):
     # Drone should decelerate when close to target
     # Acceleration should be zero or negative
     assert physics.acceleration <= 0, \
-        f"Acceleration {physics.acceleration} should be zero or negative when close to target" 
\ No newline at end of file
+        f"Acceleration {physics.acceleration} should be zero or negative when close to target" 
+
+def test_short_step_position(physics):
+    """Test that short steps land where the spherical formulas put them."""
+    start = physics.position
+    for heading in (0.0, 45.0, 90.0, 200.0):
+        physics.position = start
+        physics.heading = heading
+        new_position = physics._calculate_new_position(10.0)
+        
+        # Moved 10m along the heading, to within a centimeter
+        assert abs(physics._haversine_distance(start, new_position) - 10.0) < 0.01
+        assert abs(physics._calculate_heading(start, new_position) - heading) < 0.01
+
+def test_heading_and_distance(physics):
+    """Test that the fused calculation matches the separate ones."""
+    start = physics.position
+    for end in ((51.508351, -0.127758), (51.507351, -0.126758), (51.5, -0.2), (-33.86, 151.21)):
+        heading, distance = physics._heading_and_distance(start, end)
+        assert heading == pytest.approx(physics._calculate_heading(start, end))
+        assert distance == pytest.approx(physics._haversine_distance(start, end))
+
+def test_fixed_time_step(physics):
+    """Test that an explicit dt replaces the clock and matches stepping one at a time."""
+    target = (51.508251, -0.127758)
+    stepped = DronePhysics()
+    stepped.position = physics.position
+    last_update_time = physics.last_update_time
+    
+    for _ in range(10):
+        physics.update_physics(target, dt=0.5)
+    stepped.update_physics_n(target, 0.5, 10)
+    
+    assert physics.last_update_time == last_update_time
+    assert stepped.position == physics.position
+    assert stepped.velocity == physics.velocity
+    assert stepped.heading == physics.heading
+
+def test_flat_earth_step_matches_spherical_near_threshold(physics):
+    """Test that both position branches agree to a centimeter at the switch-over."""
+    threshold = kernels.SMALL_ANGLE * physics.earth_radius
+    for lat in (0.0, 51.5, 80.0, 86.9, -86.9):
+        physics.position = (lat, 10.0)
+        for heading in range(0, 360, 15):
+            physics.heading = float(heading)
+            flat = physics._calculate_new_position(threshold * (1 - 1e-9))
+            spherical = physics._calculate_new_position(threshold)
+            assert physics._haversine_distance(flat, spherical) < 0.01
@@ -4,17 +4,19 @@ from unittest.mock import patch, MagicMock
 from simulation.drone_simulator import DroneSimulator
 from simulation.drone_physics import DronePhysics
 
+class OkResponse:
+    """Successful API response, shared by every mocked request."""
+    status_code = 201
+    headers = {'X-Anomaly': '0'}
+    content = b'{"flight_id": 1, "position_id": 1, "reading_id": 1, "is_anomaly": false}'
+    text = content.decode()
+
+OK_RESPONSE = OkResponse()
+
 @pytest.fixture
 def mock_api():
     """Set up mock API calls to avoid network and DB dependencies."""
-    with patch('requests.post') as mock_post:
-        mock_post.return_value.status_code = 201
-        mock_post.return_value.json.return_value = {
-            'flight_id': 1,
-            'position_id': 1,
-            'reading_id': 1,
-            'is_anomaly': False
-        }
+    with patch('requests.Session.post', return_value=OK_RESPONSE) as mock_post:
         yield mock_post
 
 def test_simulator_initializes_physics(mock_api):
@@ -87,14 +89,10 @@ def test_sensor_noise_levels(mock_api):
         }
     })
     
-    # Collect several readings to analyse variability
-    position = (51.5074, -0.1278)  # London
-    low_noise_temps = []
-    high_noise_temps = []
-    
-    for _ in range(20):
-        low_noise_temps.append(simulator_low_noise.generate_sensor_reading(position)['temperature'])
-        high_noise_temps.append(simulator_high_noise.generate_sensor_reading(position)['temperature'])
+    # Collect several readings to analyse variability, generated as one block each
+    positions = [(51.5074, -0.1278)] * 20  # London
+    low_noise_temps = [r['temperature'] for r in simulator_low_noise.generate_sensor_block(positions)]
+    high_noise_temps = [r['temperature'] for r in simulator_high_noise.generate_sensor_block(positions)]
     
     # Calculate temperature variances (max-min range)
     low_temp_variance = max(low_noise_temps) - min(low_noise_temps)
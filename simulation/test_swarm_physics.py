@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+from simulation.drone_physics import DronePhysics
+from simulation.swarm_physics import SwarmPhysics
+
+STARTS = [
+    (51.507351, -0.127758),
+    (51.508351, -0.126758),
+    (51.506351, -0.128758),
+]
+TARGETS = [
+    (51.508251, -0.127758),  # North
+    (51.508351, -0.125758),  # East
+    (51.505351, -0.129758),  # South-west
+]
+
+def test_initialisation():
+    """Test that the swarm starts at rest at the given positions."""
+    swarm = SwarmPhysics(STARTS)
+    assert len(swarm) == 3
+    assert np.allclose(swarm.positions, STARTS)
+    assert np.all(swarm.velocity == 0.0)
+    assert np.all(swarm.heading == 0.0)
+
+def test_matches_single_drone_physics():
+    """Test that each drone in the swarm follows the DronePhysics model."""
+    dt = 0.5
+    swarm = SwarmPhysics(STARTS)
+    drones = []
+    for start in STARTS:
+        drone = DronePhysics()
+        drone.set_position(start)
+        drones.append(drone)
+    
+    for step in range(20):
+        swarm.update_physics(TARGETS, dt)
+        for drone, target in zip(drones, TARGETS):
+            drone.update_physics(target, dt)
+    
+    assert np.allclose(swarm.positions, [drone.position for drone in drones], rtol=0, atol=1e-9)
+    assert np.allclose(swarm.velocity, [drone.velocity for drone in drones])
+    assert np.allclose(np.degrees(swarm.heading), [drone.heading for drone in drones])
+
+def test_moves_toward_target():
+    """Test that a drone heading north gains latitude."""
+    swarm = SwarmPhysics(STARTS[:1])
+    for _ in range(10):
+        positions = swarm.update_physics(TARGETS[:1], 1.0)
+    assert positions[0, 0] > STARTS[0][0]
+    assert positions[0, 1] == pytest.approx(STARTS[0][1], abs=1e-6)
+
+def test_velocity_limits():
+    """Test that no drone exceeds max_velocity."""
+    swarm = SwarmPhysics(STARTS)
+    swarm.max_velocity = 5.0
+    swarm.max_acceleration = 10.0
+    swarm.inertia_factor = 0.1
+    
+    for _ in range(5):
+        swarm.update_physics([(52.0, -0.127758)] * 3, 3.0)
+    
+    assert np.all(swarm.velocity <= 5.0)
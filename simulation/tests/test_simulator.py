@@ -2,20 +2,30 @@
 import json
 import os
 import tempfile
+import threading
 from unittest import mock
 from datetime import datetime
-from simulation.drone_simulator import DroneSimulator
+import orjson
+from simulation.drone_simulator import DroneSimulator, REQUEST_TIMEOUT, JSON_HEADERS, run_sweep
 
 class MockResponse:
     """Mock response class to simulate requests.Response objects"""
-    def __init__(self, json_data, status_code):
+    def __init__(self, json_data, status_code, headers=None):
         self.json_data = json_data
         self.status_code = status_code
+        self.headers = headers or {}
         self.text = json.dumps(json_data)
+        self.content = self.text.encode()
     
     def json(self):
         return self.json_data
 
+def flush_and_end(simulator):
+    """Stand-in for end_flight that sends the remaining samples without ending the flight"""
+    simulator.flush_samples()
+    simulator.wait_for_pending_sends()
+    return True
+
 def test_drone_simulator_init():
     """Test the initialisation of the DroneSimulator class"""
     simulator = DroneSimulator()
@@ -164,12 +174,28 @@ def test_sensor_noise_levels():
     assert temp_range_high >= temp_range_low * 0.5
     assert humidity_range_high >= humidity_range_low * 0.5
 
+class FakeClock:
+    """Monotonic clock that only moves when sleep is called"""
+    def __init__(self):
+        self.now = 0.0
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+@mock.patch('time.monotonic')
 @mock.patch('time.sleep')
 @mock.patch('simulation.drone_physics.DronePhysics.update_physics')
-def test_simulation_speed(mock_update_physics, mock_sleep):
+def test_simulation_speed(mock_update_physics, mock_sleep, mock_monotonic):
     """Test that simulation speed affects the time between waypoints"""
+    clock = FakeClock()
+    mock_monotonic.side_effect = clock.monotonic
+    mock_sleep.side_effect = clock.sleep
+    
     # Mock the physics engine to immediately return the target position
-    mock_update_physics.side_effect = lambda target_pos: target_pos
+    mock_update_physics.side_effect = lambda target_pos, dt=None: target_pos
     
     # Create a simulator with fast speed
     fast_config = {"simulation_speed": 2.0}
@@ -207,7 +233,7 @@ def test_simulation_speed(mock_update_physics, mock_sleep):
         # Verify sleep time (should be 1.0 / 0.5 = 2.0 seconds)
         mock_sleep.assert_called_with(2.0)
 
-@mock.patch('requests.post')
+@mock.patch('requests.Session.post')
 def test_start_flight_success(mock_post):
     """Test starting a flight with a successful API response"""
     # Mock successful API response
@@ -218,11 +244,11 @@ def test_start_flight_success(mock_post):
     flight_id = simulator.start_flight()
     
     # Verify API call and result
-    mock_post.assert_called_once_with(f"{simulator.api_url}/api/flights/start")
+    mock_post.assert_called_once_with(f"{simulator.api_url}/api/flights/start", timeout=REQUEST_TIMEOUT)
     assert flight_id == 1
     assert simulator.flight_id == 1
 
-@mock.patch('requests.post')
+@mock.patch('requests.Session.post')
 def test_start_flight_failure(mock_post):
     """Test starting a flight with a failed API response"""
     # Mock failed API response
@@ -233,11 +259,11 @@ def test_start_flight_failure(mock_post):
     flight_id = simulator.start_flight()
     
     # Verify API call and result
-    mock_post.assert_called_once_with(f"{simulator.api_url}/api/flights/start")
+    mock_post.assert_called_once_with(f"{simulator.api_url}/api/flights/start", timeout=REQUEST_TIMEOUT)
     assert flight_id is None
     assert simulator.flight_id is None
 
-@mock.patch('requests.post')
+@mock.patch('requests.Session.post')
 def test_end_flight_success(mock_post):
     """Test ending a flight with a successful API response"""
     # Mock successful API response
@@ -249,10 +275,10 @@ def test_end_flight_success(mock_post):
     result = simulator.end_flight()
     
     # Verify API call and result
-    mock_post.assert_called_once_with(f"{simulator.api_url}/api/flights/1/end")
+    mock_post.assert_called_once_with(f"{simulator.api_url}/api/flights/1/end", timeout=REQUEST_TIMEOUT)
     assert result is True
 
-@mock.patch('requests.post')
+@mock.patch('requests.Session.post')
 def test_end_flight_no_flight_id(mock_post):
     """Test ending a flight without a flight_id"""
     simulator = DroneSimulator()
@@ -262,7 +288,7 @@ def test_end_flight_no_flight_id(mock_post):
     mock_post.assert_not_called()
     assert result is False
 
-@mock.patch('requests.post')
+@mock.patch('requests.Session.post')
 def test_send_data_to_api_success(mock_post):
     """Test sending data to API with a successful response"""
     # Mock successful API response
@@ -292,11 +318,13 @@ def test_send_data_to_api_success(mock_post):
     # Verify API call and result
     mock_post.assert_called_once_with(
         f"{simulator.api_url}/api/flights/1/log_data",
-        json=test_data
+        data=orjson.dumps(test_data),
+        headers=JSON_HEADERS,
+        timeout=REQUEST_TIMEOUT
     )
     assert result is True
 
-@mock.patch('requests.post')
+@mock.patch('requests.Session.post')
 def test_send_data_to_api_no_flight_id(mock_post):
     """Test sending data to API without a flight_id"""
     # Test data
@@ -319,18 +347,17 @@ def test_send_data_to_api_no_flight_id(mock_post):
     assert result is False
 
 @mock.patch.object(DroneSimulator, 'start_flight')
-@mock.patch.object(DroneSimulator, 'send_data_to_api')
-@mock.patch.object(DroneSimulator, 'end_flight')
+@mock.patch.object(DroneSimulator, 'send_batch_to_api')
+@mock.patch.object(DroneSimulator, 'end_flight', autospec=True, side_effect=flush_and_end)
 @mock.patch('simulation.drone_physics.DronePhysics.update_physics')
 def test_simulate_path(mock_update_physics, mock_end_flight, mock_send_data, mock_start_flight):
     """Test the main simulate_path method with mocked API calls"""
     # Mock the physics engine to immediately return the target position
-    mock_update_physics.side_effect = lambda target_pos: target_pos
+    mock_update_physics.side_effect = lambda target_pos, dt=None: target_pos
     
     # Configure mocks
     mock_start_flight.return_value = 1
     mock_send_data.return_value = True
-    mock_end_flight.return_value = True
     
     # Create simulator with a limited number of waypoints for faster testing
     simulator = DroneSimulator()
@@ -339,9 +366,10 @@ def test_simulate_path(mock_update_physics, mock_end_flight, mock_send_data, moc
     # Run simulation
     flight_data = simulator.simulate_path()
     
-    # Verify API calls
+    # Verify API calls (the 3 samples fit in one batch)
     mock_start_flight.assert_called_once()
-    assert mock_send_data.call_count == len(simulator.waypoints)
+    mock_send_data.assert_called_once()
+    assert mock_send_data.call_args.args[0] == flight_data
     mock_end_flight.assert_called_once()
     
     # Verify collected data
@@ -353,4 +381,168 @@ def test_simulate_path(mock_update_physics, mock_end_flight, mock_send_data, moc
         assert 'altitude' in data_point
         assert 'temperature' in data_point
         assert 'humidity' in data_point
-        assert 'air_quality_index' in data_point 
\ No newline at end of file
+        assert 'air_quality_index' in data_point
+
+@mock.patch('requests.Session.close')
+@mock.patch('requests.Session.post')
+def test_session_reused_across_requests(mock_post, mock_close):
+    """Test that all API calls go through one session, closed on exit"""
+    mock_post.return_value = MockResponse({'flight_id': 1}, 201)
+    
+    with DroneSimulator() as simulator:
+        session = simulator.session
+        simulator.start_flight()
+        simulator.send_data_to_api({'latitude': 51.507351, 'longitude': -0.127758})
+        
+        assert simulator.session is session
+        assert mock_post.call_count == 2
+        mock_close.assert_not_called()
+    
+    mock_close.assert_called_once()
+
+@mock.patch.object(DroneSimulator, 'start_flight', return_value=1)
+@mock.patch('simulation.drone_physics.DronePhysics.update_physics')
+def test_sends_do_not_block_simulation(mock_update_physics, mock_start_flight):
+    """Test that samples are sent in the background and all arrive before the flight ends"""
+    mock_update_physics.side_effect = lambda target_pos, dt=None: target_pos
+    release = threading.Event()
+    sent = []
+    ticks = []
+    
+    def send_data(data):
+        assert release.wait(timeout=5)
+        sent.append(data)
+        return True
+    
+    def sleep(seconds):
+        # The simulation keeps ticking while every send is still waiting
+        assert sent == []
+        ticks.append(seconds)
+        if len(ticks) == 3:
+            release.set()
+    
+    def end_flight(url, **kwargs):
+        assert len(sent) == 3
+        return MockResponse({'message': 'Flight ended'}, 200)
+    
+    with DroneSimulator(config={"batch_size": 1}) as simulator:
+        simulator.flight_id = 1
+        simulator.waypoints = simulator.waypoints[:3]
+        with mock.patch.object(simulator, 'send_data_to_api', side_effect=send_data), \
+             mock.patch.object(simulator.session, 'post', side_effect=end_flight) as mock_post, \
+             mock.patch('time.sleep', side_effect=sleep):
+            flight_data = simulator.simulate_path()
+    
+    assert sorted(map(id, sent)) == sorted(map(id, flight_data))
+    mock_post.assert_called_once_with(f"{simulator.api_url}/api/flights/1/end", timeout=REQUEST_TIMEOUT)
+
+@mock.patch('requests.Session.post')
+def test_samples_sent_in_batches(mock_post):
+    """Test that buffered samples are posted to the batch endpoint, with the remainder sent on end_flight"""
+    mock_post.return_value = MockResponse({'results': [{'is_anomaly': False}] * 2}, 201)
+    samples = [{'latitude': 51.507351, 'longitude': -0.127758, 'temperature': float(i)} for i in range(5)]
+    
+    with DroneSimulator(config={"batch_size": 2}) as simulator:
+        simulator.flight_id = 1
+        for sample in samples:
+            simulator.buffer_sample(sample)
+        simulator.end_flight()
+    
+    batch_calls = [c for c in mock_post.call_args_list if c.args[0].endswith('/log_data/batch')]
+    assert [orjson.loads(c.kwargs['data']) for c in batch_calls] == [{'samples': samples[:2]}, {'samples': samples[2:4]}]
+    mock_post.assert_any_call(f"{simulator.api_url}/api/flights/1/log_data", data=orjson.dumps(samples[4]),
+                              headers=JSON_HEADERS, timeout=REQUEST_TIMEOUT)
+    assert mock_post.call_args == mock.call(f"{simulator.api_url}/api/flights/1/end", timeout=REQUEST_TIMEOUT)
+
+def test_precomputed_sensor_noise():
+    """Test that batched noise stays within the configured levels and feeds sensor readings"""
+    simulator = DroneSimulator()
+    noise = simulator.precompute_sensor_noise(1000)
+    
+    assert noise.shape == (1000, 4)
+    assert (abs(noise[:, 0]) <= 20.0).all()  # Altitude ±20
+    assert (abs(noise[:, 1]) <= 5.0).all()  # Temperature ±5
+    assert (abs(noise[:, 2]) <= 20.0).all()  # Humidity ±20
+    assert ((noise[:, 3] >= -25.0) & (noise[:, 3] <= 50.0)).all()  # AQI -25/+50
+    
+    reading = simulator.generate_sensor_reading((51.507351, -0.127758), noise=(1.0, 2.0, -3.0, 4.0))
+    assert reading['altitude'] == 101.0
+    assert reading['temperature'] == 22.0
+    assert reading['humidity'] == 57.0
+    assert reading['air_quality_index'] == 54.0
+    assert type(reading['temperature']) is float
+
+def test_generate_sensor_block():
+    """Test that a block of readings matches the single reading format and is reproducible with a seed"""
+    positions = [(51.507351, -0.127758), (51.507951, -0.127158), (51.508351, -0.126758)]
+    
+    readings = DroneSimulator(config={"random_seed": 42}).generate_sensor_block(positions)
+    single = DroneSimulator().generate_sensor_reading(positions[0])
+    
+    assert len(readings) == len(positions)
+    for reading, position in zip(readings, positions):
+        assert set(reading) == set(single)
+        assert (reading['latitude'], reading['longitude']) == position
+        assert 80 <= reading['altitude'] <= 120
+        assert 15 <= reading['temperature'] <= 25
+        assert 40 <= reading['humidity'] <= 80
+        assert reading['air_quality_index'] == round(reading['air_quality_index'])
+        assert type(reading['temperature']) is float
+    
+    again = DroneSimulator(config={"random_seed": 42}).generate_sensor_block(positions)
+    assert [r['temperature'] for r in again] == [r['temperature'] for r in readings]
+
+@mock.patch.object(DroneSimulator, 'start_flight', return_value=1)
+@mock.patch.object(DroneSimulator, 'end_flight', autospec=True, side_effect=flush_and_end)
+@mock.patch('simulation.drone_physics.DronePhysics.update_physics')
+def test_tick_work_counts_toward_wait(mock_update_physics, mock_end_flight, mock_start_flight):
+    """Test that time spent on a tick is taken off its wait, and a late tick does not sleep"""
+    clock = FakeClock()
+    # The first two ticks take 0.3 s of work, the third takes longer than a tick
+    work = iter([0.3, 0.3, 1.5])
+    
+    def update_physics(target_pos, dt=None):
+        clock.now += next(work)
+        return target_pos
+    
+    mock_update_physics.side_effect = update_physics
+    
+    with DroneSimulator(config={"simulation_speed": 1.0}) as simulator:
+        simulator.waypoints = simulator.waypoints[:3]
+        with mock.patch.object(simulator, 'send_batch_to_api', return_value=True), \
+             mock.patch('time.monotonic', side_effect=clock.monotonic), \
+             mock.patch('time.sleep', side_effect=clock.sleep) as mock_sleep:
+            simulator.simulate_path()
+    
+    assert [round(c.args[0], 6) for c in mock_sleep.call_args_list] == [0.7, 0.7]
+
+def test_run_sweep_returns_result_per_config():
+    """Test that a sweep runs every configuration in its own process and keeps their order"""
+    # Nothing listens on port 1, so each flight fails to start and returns no data
+    results = run_sweep("http://127.0.0.1:1", [{"simulation_speed": 2.0}, {"simulation_speed": 4.0}], max_workers=2)
+    
+    assert results == [[], []]
+
+@mock.patch.object(DroneSimulator, 'start_flight', return_value=1)
+@mock.patch.object(DroneSimulator, 'end_flight', autospec=True, side_effect=flush_and_end)
+@mock.patch('simulation.drone_physics.DronePhysics.update_physics')
+def test_samples_reach_api_in_order(mock_update_physics, mock_end_flight, mock_start_flight):
+    """Test that background sends reach the API in the order the samples were taken"""
+    mock_update_physics.side_effect = lambda target_pos, dt=None: target_pos
+    sent = []
+    # Each send is quicker than the one before, so concurrent sends would overtake
+    delays = iter([0.04, 0.03, 0.02, 0.01])
+    
+    def send(payload):
+        # Not time.sleep, which is mocked for the simulation loop
+        threading.Event().wait(next(delays))
+        sent.extend(payload if isinstance(payload, list) else [payload])
+        return True
+    
+    with DroneSimulator(config={"batch_size": 2}) as simulator:
+        with mock.patch.object(simulator, 'send_data_to_api', side_effect=send), \
+             mock.patch.object(simulator, 'send_batch_to_api', side_effect=send), \
+             mock.patch('time.sleep'):
+            flight_data = simulator.simulate_path()
+    
+    assert [id(s) for s in sent] == [id(s) for s in flight_data]
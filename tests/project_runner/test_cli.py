@@ -290,4 +290,22 @@ def test_main_keyboard_interrupt(mock_main_dependencies, reset_processes):
     mocks['start_frontend'].assert_called_once_with(cli.processes)
     
     # Verify monitor was called once then exited due to KeyboardInterrupt
-    mocks['monitor'].assert_called_once_with(cli.processes) 
\ No newline at end of file
+    mocks['monitor'].assert_called_once_with(cli.processes)
+
+def test_main_starts_servers_concurrently(mock_main_dependencies, reset_processes):
+    """Test that the frontend starts while the backend is still coming up."""
+    import threading
+    mocks = mock_main_dependencies
+    frontend_started = threading.Event()
+    
+    # The backend only reports ready once the frontend start has begun
+    mocks['start_backend'].side_effect = lambda procs: frontend_started.wait(timeout=5)
+    mocks['start_frontend'].side_effect = lambda procs: frontend_started.set() or True
+    mocks['monitor'].side_effect = [False]
+    cli.processes.append(MagicMock())
+    
+    cli.main()
+    
+    assert frontend_started.is_set()
+    mocks['start_backend'].assert_called_once_with(cli.processes)
+    mocks['start_frontend'].assert_called_once_with(cli.processes)
@@ -4,6 +4,7 @@ Tests for the project_runner.postgres module.
 import pytest
 from unittest.mock import patch, MagicMock
 import subprocess
+import socket
 import sys
 import os
 
@@ -12,6 +13,24 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 from project_runner import postgres
 
+# The real probe, before the autouse fixture replaces it
+port_open = postgres._port_open
+
+@pytest.fixture(autouse=True)
+def clear_config_cache():
+    """Make each test read the PostgreSQL configuration afresh."""
+    postgres._load_config.cache_clear()
+    yield
+    postgres._load_config.cache_clear()
+
+@pytest.fixture(autouse=True)
+def pg_port_open():
+    """Let checks reach pg_isready as if the PostgreSQL port were listening."""
+    postgres._pg_ready_cache.clear()
+    with patch('project_runner.postgres._port_open', return_value=True) as mock_port_open:
+        yield mock_port_open
+    postgres._pg_ready_cache.clear()
+
 @pytest.mark.parametrize("system,expected", [
     ('Windows', {
         'pg_isready': r"C:\Program Files\PostgreSQL\16\bin\pg_isready.exe",
@@ -29,9 +48,9 @@ def test_get_config_default(system, expected):
     with patch('platform.system', return_value=system):
         with patch('pathlib.Path.exists', return_value=False):
             config = postgres.get_config()
-            assert config['pg_isready'] == expected['pg_isready']
-            assert config['pg_ctl'] == expected['pg_ctl']
-            assert config['data_dir'] == expected['data_dir']
+            assert config.pg_isready == expected['pg_isready']
+            assert config.pg_ctl == expected['pg_ctl']
+            assert config.data_dir == expected['data_dir']
 
 def test_get_config_from_file():
     """Test getting config from file."""
@@ -51,21 +70,57 @@ def test_get_config_from_file():
                     with patch('configparser.ConfigParser.__contains__', 
                               return_value=True):
                         config = postgres.get_config()
-                        assert config['pg_isready'] == '/custom/pg_isready'
-                        assert config['pg_ctl'] == '/custom/pg_ctl'
-                        assert config['data_dir'] == '/custom/data'
+                        assert config.pg_isready == '/custom/pg_isready'
+                        assert config.pg_ctl == '/custom/pg_ctl'
+                        assert config.data_dir == '/custom/data'
+
+def test_get_config_is_cached():
+    """Test that the configuration is only read once."""
+    with patch('platform.system', return_value='Linux') as mock_system:
+        with patch('pathlib.Path.exists', return_value=False):
+            first = postgres.get_config()
+            second = postgres.get_config()
+    
+    assert first is second
+    mock_system.assert_called_once()
+    with pytest.raises(AttributeError):
+        first.pg_ctl = '/other/pg_ctl'
+
+def test_get_config_reloads_changed_file(tmp_path, monkeypatch):
+    """Test that config.ini is parsed again only after it changes."""
+    import os
+    config_file = tmp_path / 'config.ini'
+    config_file.write_text("[PostgreSQL]\npg_ctl = /first/pg_ctl\n")
+    monkeypatch.setattr(postgres, 'CONFIG_PATH', config_file)
+    
+    import configparser
+    real_read = configparser.ConfigParser.read
+    with patch('configparser.ConfigParser.read', autospec=True, side_effect=real_read) as mock_read:
+        first = postgres.get_config()
+        assert postgres.get_config() is first
+        assert mock_read.call_count == 1
+        
+        config_file.write_text("[PostgreSQL]\npg_ctl = /second/pg_ctl\n")
+        stat = config_file.stat()
+        os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        
+        assert postgres.get_config().pg_ctl == '/second/pg_ctl'
+        assert mock_read.call_count == 2
+    assert first.pg_ctl == '/first/pg_ctl'
 
 @patch('project_runner.postgres.get_config')
 @patch('subprocess.run')
 def test_is_postgres_running_success(mock_run, mock_get_config):
     """Test checking if PostgreSQL is running when it is running."""
     # Setup mocks
-    mock_get_config.return_value = {
-        'pg_isready': '/path/to/pg_isready'
-    }
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
     
     mock_process = MagicMock()
-    mock_process.stdout = "localhost:5432 - accepting connections"
+    mock_process.stdout = b"localhost:5432 - accepting connections"
     mock_run.return_value = mock_process
     
     # Call the function
@@ -77,7 +132,7 @@ def test_is_postgres_running_success(mock_run, mock_get_config):
     mock_run.assert_called_once_with(
         ['/path/to/pg_isready'],
         capture_output=True,
-        text=True
+        timeout=5
     )
 
 @patch('project_runner.postgres.get_config')
@@ -85,12 +140,14 @@ def test_is_postgres_running_success(mock_run, mock_get_config):
 def test_is_postgres_running_not_running(mock_run, mock_get_config):
     """Test checking if PostgreSQL is running when it is not running."""
     # Setup mocks
-    mock_get_config.return_value = {
-        'pg_isready': '/path/to/pg_isready'
-    }
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
     
     mock_process = MagicMock()
-    mock_process.stdout = "localhost:5432 - no response"
+    mock_process.stdout = b"localhost:5432 - no response"
     mock_run.return_value = mock_process
     
     # Call the function
@@ -106,9 +163,11 @@ def test_is_postgres_running_not_running(mock_run, mock_get_config):
 def test_is_postgres_running_exception(mock_run, mock_get_config):
     """Test checking if PostgreSQL is running when an exception occurs."""
     # Setup mocks
-    mock_get_config.return_value = {
-        'pg_isready': '/path/to/pg_isready'
-    }
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
     
     # Setup mock to raise an exception
     mock_run.side_effect = Exception("Command not found")
@@ -121,6 +180,76 @@ def test_is_postgres_running_exception(mock_run, mock_get_config):
     # Verify subprocess.run was called
     mock_run.assert_called_once()
 
+@patch('project_runner.postgres.get_config')
+@patch('subprocess.run')
+def test_is_postgres_running_port_closed(mock_run, mock_get_config, pg_port_open):
+    """Test that pg_isready is not spawned while nothing listens on the port."""
+    pg_port_open.return_value = False
+    
+    assert postgres.is_postgres_running() is False
+    mock_run.assert_not_called()
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="Unix sockets only")
+def test_port_open_follows_pghost_socket_dir(tmp_path, monkeypatch):
+    """Test that the probe finds a server listening only on its Unix socket, like pg_isready."""
+    with socket.socket(socket.AF_UNIX) as server:
+        server.bind(str(tmp_path / '.s.PGSQL.5432'))
+        server.listen()
+        
+        monkeypatch.setenv('PGHOST', str(tmp_path))
+        assert port_open(5432) is True
+        assert port_open(5433) is False
+
+def test_port_open_follows_pghost_ipv6():
+    """Test that the probe reaches a server listening only on ::1."""
+    try:
+        server = socket.socket(socket.AF_INET6)
+        server.bind(('::1', 0))
+    except OSError:
+        pytest.skip("IPv6 loopback not available")
+    with server:
+        server.listen()
+        with patch.dict(os.environ, {'PGHOST': '::1'}):
+            assert port_open(server.getsockname()[1]) is True
+
+@patch('project_runner.postgres.get_config')
+@patch('subprocess.run')
+def test_is_postgres_running_cached(mock_run, mock_get_config):
+    """Test that a positive check is reused for a few seconds."""
+    mock_run.return_value = MagicMock(stdout=b"localhost:5432 - accepting connections")
+    
+    with patch('project_runner.postgres.time.monotonic', side_effect=[0, 0, 4, 6, 6]):
+        assert postgres.is_postgres_running() is True
+        assert postgres.is_postgres_running() is True
+        assert mock_run.call_count == 1
+        
+        # Checked again once the cached result expires
+        assert postgres.is_postgres_running() is True
+        assert mock_run.call_count == 2
+
+@patch('project_runner.postgres.get_config')
+@patch('time.sleep')
+@patch('subprocess.Popen')
+@patch('subprocess.run')
+def test_start_postgres_keeps_pg_ctl_in_runner_group(mock_run, mock_popen, mock_sleep, mock_get_config, pg_port_open):
+    """Test that pg_ctl is not moved to a new process group, so the postmaster still gets Ctrl+C."""
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
+    # Not running until pg_ctl has been started
+    pg_port_open.side_effect = [False, True]
+    mock_popen.return_value.returncode = 0
+    mock_run.return_value.stdout = b"localhost:5432 - accepting connections"
+    
+    result, process = postgres.start_postgres()
+    
+    assert result is True
+    mock_popen.assert_called_once()
+    assert 'start_new_session' not in mock_popen.call_args.kwargs
+    assert 'creationflags' not in mock_popen.call_args.kwargs
+
 @patch('project_runner.postgres.get_config')
 @patch('time.sleep')
 @patch('subprocess.Popen')
@@ -128,22 +257,22 @@ def test_is_postgres_running_exception(mock_run, mock_get_config):
 def test_start_postgres_success(mock_run, mock_popen, mock_sleep, mock_get_config):
     """Test starting PostgreSQL when it succeeds."""
     # Setup mocks
-    mock_get_config.return_value = {
-        'pg_ctl': '/path/to/pg_ctl',
-        'data_dir': '/path/to/data',
-        'pg_isready': '/path/to/pg_isready'
-    }
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
     
     # Setup mock for subprocess.Popen
     mock_process = MagicMock()
-    mock_process.poll.side_effect = [None, 0]  # First None (still running), then 0 (success)
+    mock_process.wait.return_value = 0
     
     mock_process.returncode = 0
     mock_popen.return_value = mock_process
     
     # Setup mock for subprocess.run (pg_isready check)
     mock_run_result = MagicMock()
-    mock_run_result.stdout = "localhost:5432 - accepting connections"
+    mock_run_result.stdout = b"localhost:5432 - accepting connections"
     mock_run.return_value = mock_run_result
     
     # Call the function
@@ -153,20 +282,48 @@ def test_start_postgres_success(mock_run, mock_popen, mock_sleep, mock_get_confi
     assert result is True
     assert process is mock_process or process is None  # Could be None if "already running" case
 
+@patch('project_runner.postgres.get_config')
+@patch('time.sleep')
+@patch('subprocess.Popen')
+@patch('subprocess.run')
+def test_start_postgres_backs_off_until_ready(mock_run, mock_popen, mock_sleep, mock_get_config):
+    """Test that startup verification backs off between pg_isready checks."""
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
+    
+    mock_process = MagicMock()
+    mock_process.returncode = 0
+    mock_popen.return_value = mock_process
+    
+    # Not running before pg_ctl, then ready on the third check after it
+    outputs = [b"no response", b"no response", b"no response", b"accepting connections"]
+    mock_run.side_effect = [MagicMock(stdout=output) for output in outputs]
+    
+    result, process = postgres.start_postgres()
+    
+    assert result is True
+    assert process is mock_process
+    assert mock_run.call_count == 4
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0, 0.2, 0.4]
+
 @patch('project_runner.postgres.get_config')
 @patch('time.sleep')
 @patch('subprocess.Popen')
 def test_start_postgres_failure(mock_popen, mock_sleep, mock_get_config):
     """Test starting PostgreSQL when it fails."""
     # Setup mocks
-    mock_get_config.return_value = {
-        'pg_ctl': '/path/to/pg_ctl',
-        'data_dir': '/path/to/data'
-    }
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
     
     # Setup mock for subprocess.Popen
     mock_process = MagicMock()
-    mock_process.poll.side_effect = [None, 1]  # First None (still running), then 1 (error)
+    mock_process.wait.return_value = 1
     mock_process.returncode = 1
     mock_process.stderr = MagicMock()
     mock_process.stderr.read.return_value = "some error message"
@@ -179,15 +336,65 @@ def test_start_postgres_failure(mock_popen, mock_sleep, mock_get_config):
     assert result is False
     assert process is mock_process
 
+@patch('project_runner.postgres.get_config')
+@patch('subprocess.Popen')
+@patch('subprocess.run')
+def test_start_postgres_already_running_error(mock_run, mock_popen, mock_get_config):
+    """Test that pg_ctl reporting an existing server counts as success."""
+    import io
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
+    mock_run.return_value = MagicMock(stdout=b"no response")
+    
+    mock_process = MagicMock()
+    mock_process.returncode = 1
+    mock_process.stderr = io.BytesIO(b'pg_ctl: another server might be running\npg_ctl: server is already running\n')
+    mock_popen.return_value = mock_process
+    
+    result, process = postgres.start_postgres()
+    
+    assert result is True
+    assert process is None
+    assert mock_popen.call_args.kwargs['stdout'] == subprocess.DEVNULL
+
+@patch('project_runner.postgres.get_config')
+@patch('subprocess.Popen')
+def test_start_postgres_timeout(mock_popen, mock_get_config):
+    """Test starting PostgreSQL when pg_ctl does not exit in time."""
+    # Setup mocks
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
+    
+    # Setup mock for subprocess.Popen
+    mock_process = MagicMock()
+    mock_process.wait.side_effect = subprocess.TimeoutExpired('pg_ctl', 10)
+    mock_popen.return_value = mock_process
+    
+    # Call the function
+    result, process = postgres.start_postgres(timeout=10)
+    
+    # Verify the process was waited on once and then terminated
+    assert result is False
+    assert process is mock_process
+    mock_process.wait.assert_called_once_with(timeout=10)
+    mock_process.terminate.assert_called_once()
+
 @patch('project_runner.postgres.get_config')
 @patch('subprocess.Popen')
 def test_start_postgres_exception(mock_popen, mock_get_config):
     """Test starting PostgreSQL when an exception occurs."""
     # Setup mocks
-    mock_get_config.return_value = {
-        'pg_ctl': '/path/to/pg_ctl',
-        'data_dir': '/path/to/data'
-    }
+    mock_get_config.return_value = postgres.PgConfig(
+        pg_isready='/path/to/pg_isready',
+        pg_ctl='/path/to/pg_ctl',
+        data_dir='/path/to/data'
+    )
     
     # Setup mock to raise an exception
     mock_popen.side_effect = Exception("Command not found")
@@ -11,6 +11,14 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 from project_runner import process
 
+real_leads_group = process._leads_group
+
+@pytest.fixture(autouse=True)
+def no_process_groups():
+    """Keep mock processes with made-up pids from signalling real process groups."""
+    with patch('project_runner.process._leads_group', return_value=False):
+        yield
+
 def test_monitor_processes_all_running():
     """Test monitoring processes when all are running."""
     # Create mock processes
@@ -142,6 +150,27 @@ def test_clean_up_forced_termination():
     # Verify warning was logged
     mock_log_warning.assert_called_once()
 
+def test_clean_up_shares_grace_period():
+    """Test that all processes are terminated before a single shared wait."""
+    events = []
+    processes_list = []
+    for pid in (1, 2, 3):
+        proc = MagicMock()
+        proc.pid = pid
+        proc.poll.return_value = None
+        proc.terminate.side_effect = lambda pid=pid: events.append(('terminate', pid))
+        proc.kill.side_effect = lambda pid=pid: events.append(('kill', pid))
+        processes_list.append(proc)
+    
+    with patch('time.sleep', side_effect=lambda s: events.append(('sleep', s))):
+        process.clean_up(processes_list)
+    
+    assert events == [
+        ('terminate', 1), ('terminate', 2), ('terminate', 3),
+        ('sleep', 1),
+        ('kill', 1), ('kill', 2), ('kill', 3)
+    ]
+
 def test_clean_up_exception():
     """Test cleaning up processes when an exception occurs."""
     # Create mock processes
@@ -160,4 +189,59 @@ def test_clean_up_exception():
     # Verify that terminate was called
     process1.terminate.assert_called_once()
     # Verify error was logged
-    mock_log_error.assert_called_once() 
\ No newline at end of file
+    mock_log_error.assert_called_once() 
+
+@pytest.mark.skipif(os.name == 'nt', reason="process groups are POSIX only")
+def test_clean_up_stops_process_group():
+    """Test that clean_up also stops the children of a process group leader."""
+    import subprocess
+    spawn_child = (
+        "import subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+        "print(child.pid, flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    leader = subprocess.Popen([sys.executable, "-c", spawn_child], stdout=subprocess.PIPE,
+                              **process.NEW_PROCESS_GROUP)
+    with leader:
+        child_pid = int(leader.stdout.readline())
+        
+        with patch('project_runner.process._leads_group', real_leads_group):
+            assert process._leads_group(leader)
+            process.clean_up([leader])
+        
+        assert leader.wait(timeout=5) is not None
+        # The orphaned child is gone too (or only left as a zombie)
+        try:
+            with open(f"/proc/{child_pid}/stat") as f:
+                assert f.read().split(") ")[1][0] == 'Z'
+        except FileNotFoundError:
+            pass
+
+def test_wait_for_exit_returns_when_a_process_exits():
+    """Test that waiting returns as soon as one real process exits."""
+    import subprocess
+    import time
+    short = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.2)"])
+    long = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        start = time.monotonic()
+        process.wait_for_exit([short, long], timeout=10)
+        
+        assert time.monotonic() - start < 5
+        assert process.monitor_processes([short, long]) is True
+        assert short.poll() is not None
+        assert long.poll() is None
+    finally:
+        long.kill()
+        long.wait()
+
+def test_wait_for_exit_already_exited():
+    """Test that waiting returns immediately if a process has already exited."""
+    process1 = MagicMock()
+    process1.poll.return_value = 0
+    
+    with patch('project_runner.process.wait') as mock_wait:
+        process.wait_for_exit([process1])
+    
+    mock_wait.assert_not_called()
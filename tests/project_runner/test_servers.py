@@ -12,38 +12,74 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 from project_runner import servers
-from urllib.request import URLError
+
+def http_response(status=200):
+    """Create a mock http.client response with the given status."""
+    response = MagicMock()
+    response.status = status
+    return response
+
+@pytest.fixture(autouse=True)
+def clear_port_cache():
+    """Start every test without cached port checks."""
+    servers._port_cache.clear()
+    yield
+    servers._port_cache.clear()
 
 def test_check_port_in_use_port_open():
     """Test check_port_in_use with an open port."""
-    # Mock socket.socket.connect_ex to return 0 (port in use)
+    # Mock socket.socket.bind to fail (port in use)
     mock_socket = MagicMock()
     mock_socket.__enter__.return_value = mock_socket
-    mock_socket.connect_ex.return_value = 0
+    mock_socket.bind.side_effect = OSError("Address already in use")
     
     with patch('socket.socket', return_value=mock_socket):
         result = servers.check_port_in_use(5000)
         
     assert result is True
-    mock_socket.connect_ex.assert_called_once_with(('localhost', 5000))
+    mock_socket.bind.assert_called_once_with(('127.0.0.1', 5000))
 
 def test_check_port_in_use_port_closed():
     """Test check_port_in_use with a closed port."""
-    # Mock socket.socket.connect_ex to return non-zero (port not in use)
+    # Mock socket.socket.bind to succeed (port not in use)
     mock_socket = MagicMock()
     mock_socket.__enter__.return_value = mock_socket
-    mock_socket.connect_ex.return_value = 1
     
     with patch('socket.socket', return_value=mock_socket):
         result = servers.check_port_in_use(5000)
         
     assert result is False
-    mock_socket.connect_ex.assert_called_once_with(('localhost', 5000))
+    mock_socket.bind.assert_called_once_with(('127.0.0.1', 5000))
+
+def test_check_port_in_use_cached():
+    """Test that a recent result is reused without probing again."""
+    mock_socket = MagicMock()
+    mock_socket.__enter__.return_value = mock_socket
+    
+    with patch('socket.socket', return_value=mock_socket) as mock_socket_class, \
+         patch('project_runner.servers.time.monotonic', side_effect=[0, 1, 3]):
+        assert servers.check_port_in_use(5000) is False
+        assert servers.check_port_in_use(5000) is False
+        assert mock_socket_class.call_count == 1
+        
+        # Probed again once the cached result expires
+        servers.check_port_in_use(5000)
+        assert mock_socket_class.call_count == 2
 
-@patch('project_runner.servers.time.time')
+def test_check_port_in_use_listening():
+    """Test check_port_in_use against a real listening socket."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        
+        assert servers.check_port_in_use(port) is True
+
+@patch('project_runner.servers._wait_port_open', return_value=True)
+@patch('project_runner.servers.time.monotonic')
 @patch('project_runner.servers.time.sleep')
-@patch('project_runner.servers.urlopen')
-def test_wait_for_server_success(mock_urlopen, mock_sleep, mock_time):
+@patch('project_runner.servers.HTTPConnection')
+def test_wait_for_server_success(mock_connection_class, mock_sleep, mock_time, mock_port_open):
     """Test that wait_for_server immediately returns True when the server responds successfully.
     
     This test validates:
@@ -56,9 +92,8 @@ def test_wait_for_server_success(mock_urlopen, mock_sleep, mock_time):
     mock_time.return_value = 0
     
     # Create a successful response
-    mock_response = MagicMock()
-    mock_response.getcode.return_value = 200
-    mock_urlopen.return_value = mock_response
+    mock_connection = mock_connection_class.return_value
+    mock_connection.getresponse.return_value = http_response(200)
     
     # Run the function with explicit parameters for predictable testing
     result = servers.wait_for_server(
@@ -71,19 +106,21 @@ def test_wait_for_server_success(mock_urlopen, mock_sleep, mock_time):
     # Verify the function returns True for successful response
     assert result is True, "Function should return True for a successful server response"
     
-    # Verify URLopen was called exactly once
-    assert mock_urlopen.call_count == 1, "URLopen should be called exactly once for immediate success"
+    # Verify a single HEAD request was made
+    assert mock_connection.request.call_count == 1, "One request should be made for immediate success"
     
-    # Verify URLopen was called with the correct parameters
-    mock_urlopen.assert_called_once_with("http://test-url", timeout=5)
+    # Verify the connection was opened with the correct parameters
+    mock_connection_class.assert_called_once_with("test-url", 80, timeout=5)
+    mock_connection.request.assert_called_once_with("HEAD", "/")
     
     # Verify sleep was not called at all
     mock_sleep.assert_not_called(), "Sleep should not be called when the first attempt succeeds"
 
-@patch('project_runner.servers.time.time')
+@patch('project_runner.servers._wait_port_open', return_value=True)
+@patch('project_runner.servers.time.monotonic')
 @patch('project_runner.servers.time.sleep')
-@patch('project_runner.servers.urlopen')
-def test_wait_for_server_eventual_success(mock_urlopen, mock_sleep, mock_time):
+@patch('project_runner.servers.HTTPConnection')
+def test_wait_for_server_eventual_success(mock_connection_class, mock_sleep, mock_time, mock_port_open):
     """Test that wait_for_server successfully connects after initial failures.
     
     This test validates:
@@ -92,19 +129,17 @@ def test_wait_for_server_eventual_success(mock_urlopen, mock_sleep, mock_time):
     3. The function exits the loop after a successful connection
     """
     # Setup time-based mocks to control the loop
-    # First return 0, then never exceed max_time
+    # First return 0, then never reach the deadline
     mock_time.side_effect = lambda: 0  # Always return 0 to keep the while loop running
     
-    # Create a mock response for the successful attempt
-    mock_response = MagicMock()
-    mock_response.getcode.return_value = 200
-    
     # First two attempts fail with connection error, third attempt succeeds
-    mock_urlopen.side_effect = [
-        URLError("Connection refused"),
-        URLError("Connection refused"),
-        mock_response
+    mock_connection = mock_connection_class.return_value
+    mock_connection.request.side_effect = [
+        ConnectionRefusedError(),
+        ConnectionRefusedError(),
+        None
     ]
+    mock_connection.getresponse.return_value = http_response(200)
     
     # Run the function with fixed parameters
     result = servers.wait_for_server(
@@ -117,30 +152,34 @@ def test_wait_for_server_eventual_success(mock_urlopen, mock_sleep, mock_time):
     # Verify the function returns True when the server eventually responds
     assert result is True, "Function should return True when server eventually responds"
     
-    # Verify URLopen was called the expected number of times (3 in this case)
-    assert mock_urlopen.call_count == 3, "URLopen should be called until success"
+    # Verify requests were made the expected number of times (3 in this case)
+    assert mock_connection.request.call_count == 3, "Requests should be made until success"
+    
+    # The same connection object is reused across attempts
+    mock_connection_class.assert_called_once()
     
     # Verify sleep was called between attempts
     assert mock_sleep.call_count == 2, "Sleep should be called between each attempt"
 
-@patch('project_runner.servers.time.time')
+@patch('project_runner.servers._wait_port_open', return_value=True)
+@patch('project_runner.servers.time.monotonic')
 @patch('project_runner.servers.time.sleep')
-@patch('project_runner.servers.urlopen')
-def test_wait_for_server_timeout(mock_urlopen, mock_sleep, mock_time):
+@patch('project_runner.servers.HTTPConnection')
+def test_wait_for_server_timeout(mock_connection_class, mock_sleep, mock_time, mock_port_open):
     """Test that wait_for_server properly times out and returns False when a server never responds.
     
     This test validates:
-    1. The function correctly exits after max_time is reached
+    1. The function correctly exits after the deadline is reached
     2. The function returns False when the server never becomes available
     """
     # Control the while loop by returning values that will eventually exit
     time_values = [0, 0]  # First keep the loop running
-    time_values.extend([100] * 10)  # Then force loop exit with values > max_time
+    time_values.extend([100] * 10)  # Then force loop exit with values past the deadline
     mock_time.side_effect = time_values
     
-    # Simulate URLopen consistently raising a connection error
-    connection_error = URLError("Connection refused")
-    mock_urlopen.side_effect = connection_error
+    # Simulate the request consistently raising a connection error
+    mock_connection = mock_connection_class.return_value
+    mock_connection.request.side_effect = ConnectionRefusedError()
     
     # Run the function with fixed parameters
     result = servers.wait_for_server(
@@ -153,27 +192,100 @@ def test_wait_for_server_timeout(mock_urlopen, mock_sleep, mock_time):
     # Verify the function returns False when the server never responds
     assert result is False, "Function should return False when server never responds"
     
-    # Verify URLopen was called at least once
-    assert mock_urlopen.call_count > 0, "URLopen should be called at least once"
+    # Verify a request was made at least once
+    assert mock_connection.request.call_count > 0, "A request should be made at least once"
     
-    # The sleep function should not be called when we exit the loop early due to exceeding max_time
+    # The sleep function should not be called when we exit the loop early due to passing the deadline
     assert mock_sleep.call_count <= 1, "Sleep should be called at most once for a time-based exit"
 
+@patch('project_runner.servers._wait_port_open', return_value=True)
+@patch('project_runner.servers.time.monotonic', return_value=0)
+@patch('project_runner.servers.time.sleep')
+@patch('project_runner.servers.HTTPConnection')
+def test_wait_for_server_backs_off(mock_connection_class, mock_sleep, mock_time, mock_port_open):
+    """Test that retries start fast and back off up to the interval."""
+    mock_connection = mock_connection_class.return_value
+    mock_connection.request.side_effect = [ConnectionRefusedError()] * 6 + [None]
+    mock_connection.getresponse.return_value = http_response(200)
+    
+    result = servers.wait_for_server("http://test-url", max_attempts=5, interval=1)
+    
+    assert result is True
+    assert [c.args[0] for c in mock_sleep.call_args_list] == [0.05, 0.1, 0.2, 0.4, 0.8, 1]
+
+@patch('project_runner.servers.HTTPConnection')
+def test_wait_for_server_port_never_opens(mock_connection_class):
+    """Test that no HTTP request is made while nothing listens on the port."""
+    with patch('project_runner.servers._wait_port_open', return_value=False) as mock_port_open:
+        result = servers.wait_for_server("http://localhost:5000", max_attempts=2)
+    
+    assert result is False
+    assert mock_port_open.call_args.args[:2] == ('localhost', 5000)
+    mock_connection_class.return_value.request.assert_not_called()
+
+def test_wait_port_open():
+    """Test the TCP probe against a listening and a closed port."""
+    import time
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        port = listener.getsockname()[1]
+        
+        assert servers._wait_port_open('127.0.0.1', port, time.monotonic() + 2) is True
+    
+    # The port is closed once the listener is gone
+    assert servers._wait_port_open('127.0.0.1', port, time.monotonic() + 0.3) is False
+
+def test_wait_for_server_sends_head():
+    """Test wait_for_server against a real HTTP server that only answers HEAD."""
+    import threading
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    
+    class HeadOnlyHandler(BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self.send_response(200)
+            self.end_headers()
+        
+        def log_message(self, *args):
+            pass
+    
+    server = HTTPServer(('127.0.0.1', 0), HeadOnlyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/"
+        assert servers.wait_for_server(url, max_attempts=2) is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def clear_npm_cache():
+    """Make a test look npm up afresh."""
+    servers.find_npm_path.cache_clear()
+    yield
+    servers.find_npm_path.cache_clear()
+
 @patch('subprocess.run')
-def test_find_npm_path_in_path(mock_run):
+@patch('shutil.which')
+def test_find_npm_path_in_path(mock_which, mock_run, clear_npm_cache):
     """Test finding npm in PATH."""
     # npm is in PATH
+    mock_which.return_value = "/usr/bin/npm"
+    
     result = servers.find_npm_path()
     
-    assert result == "npm"
-    mock_run.assert_called_once()
+    assert result == "/usr/bin/npm"
+    mock_which.assert_called_once_with("npm")
+    # No need to start npm just to find it
+    mock_run.assert_not_called()
 
-@patch('subprocess.run')
+@patch('shutil.which')
 @patch('os.path.exists')
-def test_find_npm_path_not_in_path(mock_exists, mock_run):
+def test_find_npm_path_not_in_path(mock_exists, mock_which, clear_npm_cache):
     """Test finding npm not in PATH but in common location."""
     # npm not in PATH
-    mock_run.side_effect = FileNotFoundError()
+    mock_which.return_value = None
     
     # Mock one of the common locations existing
     mock_exists.side_effect = lambda path: path == r"C:\Program Files\nodejs\npm.cmd"
@@ -183,12 +295,12 @@ def test_find_npm_path_not_in_path(mock_exists, mock_run):
     assert result == r"C:\Program Files\nodejs\npm.cmd"
     assert mock_exists.called
 
-@patch('subprocess.run')
+@patch('shutil.which')
 @patch('os.path.exists')
-def test_find_npm_path_not_found(mock_exists, mock_run):
+def test_find_npm_path_not_found(mock_exists, mock_which, clear_npm_cache):
     """Test npm not found anywhere."""
     # npm not in PATH
-    mock_run.side_effect = FileNotFoundError()
+    mock_which.return_value = None
     
     # Mock no common locations existing
     mock_exists.return_value = False
@@ -198,6 +310,14 @@ def test_find_npm_path_not_found(mock_exists, mock_run):
     assert result is None
     assert mock_exists.called
 
+@patch('shutil.which')
+def test_find_npm_path_is_cached(mock_which, clear_npm_cache):
+    """Test that npm is only looked up once."""
+    mock_which.return_value = "/usr/bin/npm"
+    
+    assert servers.find_npm_path() == servers.find_npm_path() == "/usr/bin/npm"
+    mock_which.assert_called_once()
+
 @patch('project_runner.servers.check_port_in_use')
 @patch('project_runner.servers.wait_for_server')
 @patch('subprocess.Popen')
@@ -231,6 +351,24 @@ def test_start_backend_success(mock_sleep, mock_popen, mock_wait, mock_check_por
     # Check that process was added to the list regardless of call specifics
     assert mock_process in processes_list
 
+@patch('project_runner.servers.check_port_in_use', return_value=False)
+@patch('subprocess.Popen')
+@patch('time.sleep')
+def test_start_backend_exits_immediately(mock_sleep, mock_popen, mock_check_port, capsys):
+    """Test that the stderr of a backend that exits at once is reported."""
+    import io
+    mock_process = MagicMock()
+    mock_process.poll.return_value = 1
+    mock_process.returncode = 1
+    mock_process.stderr = io.BytesIO(b"Traceback (most recent call last):\nImportError: boom\n")
+    mock_popen.return_value = mock_process
+    
+    result = servers.start_backend()
+    
+    assert result is False
+    assert mock_popen.call_args.kwargs['stdout'] == subprocess.DEVNULL
+    assert "ImportError: boom" in capsys.readouterr().out
+
 @patch('project_runner.servers.check_port_in_use')
 @patch('project_runner.servers.wait_for_server')
 @patch('subprocess.Popen')
@@ -426,7 +564,7 @@ def test_start_simulation_success(mock_popen):
     assert result is True
     mock_popen.assert_called_once_with(
         [sys.executable, "-m", "simulation.drone_simulator"],
-        cwd=os.getcwd()
+        **servers.NEW_PROCESS_GROUP
     )
     assert mock_process in processes_list
 
@@ -442,7 +580,7 @@ def test_start_simulation_with_config(mock_popen):
     assert result is True
     mock_popen.assert_called_once_with(
         [sys.executable, "-m", "simulation.drone_simulator", "--config", "test_config.json"],
-        cwd=os.getcwd()
+        **servers.NEW_PROCESS_GROUP
     )
 
 @patch('subprocess.Popen')
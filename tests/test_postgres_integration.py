@@ -63,7 +63,7 @@ def start_postgres():
     config = postgres.get_config()
     try:
         is_running = subprocess.run(
-            [config['pg_isready']],
+            [config.pg_isready],
             capture_output=True,
             text=True,
             timeout=5
@@ -104,8 +104,10 @@ def test_is_postgres_running_integration(cleanup_postgres, stop_postgres):
     except Exception as e:
         pytest.fail(f"Exception occurred during test: {e}")
 
+@patch.dict('project_runner.postgres._pg_ready_cache')
+@patch('project_runner.postgres._port_open', return_value=True)
 @patch('subprocess.run')
-def test_start_postgres_already_running(mock_run, cleanup_postgres):
+def test_start_postgres_already_running(mock_run, mock_port_open, cleanup_postgres):
     """Test start_postgres when PostgreSQL is already running.
     
     This test verifies that when PostgreSQL is already running,
@@ -113,7 +115,7 @@ def test_start_postgres_already_running(mock_run, cleanup_postgres):
     """
     # Create a mock response with PostgreSQL already running
     mock_success = MagicMock()
-    mock_success.stdout = "localhost:5432 - accepting connections"
+    mock_success.stdout = b"localhost:5432 - accepting connections"
     
     # Configure subprocess.run to always return success
     mock_run.return_value = mock_success
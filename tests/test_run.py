@@ -10,6 +10,7 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import run
+from project_runner import postgres
 
 @pytest.fixture
 def reset_processes():
@@ -19,6 +20,14 @@ def reset_processes():
     yield
     run.processes = old_processes
 
+@pytest.fixture(autouse=True)
+def pg_port_open():
+    """Let PostgreSQL checks reach pg_isready as if its port were listening."""
+    postgres._pg_ready_cache.clear()
+    with patch('project_runner.postgres._port_open', return_value=True):
+        yield
+    postgres._pg_ready_cache.clear()
+
 @patch('run.is_postgres_running')
 @patch('run.start_postgres')
 @patch('run.start_backend')
@@ -35,8 +44,8 @@ def test_main_default_behaviour(mock_start_sim, mock_start_frontend,
     
     # Mock sys.argv
     with patch('sys.argv', ['run.py']):
-        # Call main with Ctrl+C simulated after a moment
-        with patch('run.time.sleep', side_effect=KeyboardInterrupt):
+        # Call main without registering the real cleanup handler
+        with patch('run.atexit.register'):
             run.main()
     
     # Verify postgres check was called
@@ -65,8 +74,8 @@ def test_main_with_simulation(mock_start_sim, mock_start_frontend,
     
     # Mock sys.argv with simulation flag
     with patch('sys.argv', ['run.py', '--simulation']):
-        # Call main with Ctrl+C simulated after a moment
-        with patch('run.time.sleep', side_effect=KeyboardInterrupt):
+        # Call main without registering the real cleanup handler
+        with patch('run.atexit.register'):
             run.main()
     
     # Simulation should be started
@@ -88,8 +97,8 @@ def test_main_no_frontend(mock_start_sim, mock_start_frontend,
     
     # Mock sys.argv with no-frontend flag
     with patch('sys.argv', ['run.py', '--no-frontend']):
-        # Call main with Ctrl+C simulated after a moment
-        with patch('run.time.sleep', side_effect=KeyboardInterrupt):
+        # Call main without registering the real cleanup handler
+        with patch('run.atexit.register'):
             run.main()
     
     # Frontend should not be started
@@ -97,10 +106,10 @@ def test_main_no_frontend(mock_start_sim, mock_start_frontend,
     # Backend should be started
     mock_start_backend.assert_called_once()
 
-@patch('run.check_port_in_use')
-@patch('run.wait_for_server')
-@patch('run.subprocess.Popen')
-@patch('run.time.sleep')
+@patch('project_runner.servers.check_port_in_use')
+@patch('project_runner.servers.wait_for_server')
+@patch('subprocess.Popen')
+@patch('time.sleep')
 def test_start_backend(mock_sleep, mock_popen, mock_wait, mock_check_port, reset_processes):
     """Test the start_backend function
     
@@ -140,15 +149,17 @@ def test_start_backend(mock_sleep, mock_popen, mock_wait, mock_check_port, reset
     # Verify process was added to global processes list
     assert mock_process in run.processes
 
-@patch('run.check_port_in_use')
-@patch('run.wait_for_server')
-@patch('run.subprocess.Popen')
-def test_start_backend_failure(mock_popen, mock_wait, mock_check_port, reset_processes):
+@patch('project_runner.servers.check_port_in_use')
+@patch('project_runner.servers.wait_for_server')
+@patch('subprocess.Popen')
+@patch('time.sleep')
+def test_start_backend_failure(mock_sleep, mock_popen, mock_wait, mock_check_port, reset_processes):
     """Test backend start failure"""
     # Mock server never becoming available
     mock_wait.return_value = False
-    # Mock subprocess
+    # Mock subprocess that keeps running
     mock_process = MagicMock()
+    mock_process.poll.return_value = None
     mock_popen.return_value = mock_process
     
     # Call function
@@ -159,12 +170,12 @@ def test_start_backend_failure(mock_popen, mock_wait, mock_check_port, reset_pro
     # Process should still be in the list even if server didn't respond
     assert mock_process in run.processes
 
-@patch('run.subprocess.run')
+@patch('subprocess.run')
 def test_is_postgres_running_success(mock_run):
     """Test checking if PostgreSQL is running when it is running."""
     # Setup mock to simulate PostgreSQL running
     mock_process = MagicMock()
-    mock_process.stdout = "localhost:5432 - accepting connections"
+    mock_process.stdout = b"localhost:5432 - accepting connections"
     mock_run.return_value = mock_process
     
     # Call the function
@@ -176,15 +187,15 @@ def test_is_postgres_running_success(mock_run):
     mock_run.assert_called_once_with(
         [r"C:\Program Files\PostgreSQL\16\bin\pg_isready.exe"],
         capture_output=True,
-        text=True
+        timeout=5
     )
 
-@patch('run.subprocess.run')
+@patch('subprocess.run')
 def test_is_postgres_running_not_running(mock_run):
     """Test checking if PostgreSQL is running when it is not running."""
     # Setup mock to simulate PostgreSQL not running
     mock_process = MagicMock()
-    mock_process.stdout = "localhost:5432 - no response"
+    mock_process.stdout = b"localhost:5432 - no response"
     mock_run.return_value = mock_process
     
     # Call the function
@@ -195,7 +206,7 @@ def test_is_postgres_running_not_running(mock_run):
     # Verify subprocess.run was called correctly
     mock_run.assert_called_once()
 
-@patch('run.subprocess.run')
+@patch('subprocess.run')
 def test_is_postgres_running_exception(mock_run):
     """Test checking if PostgreSQL is running when an exception occurs."""
     # Setup mock to raise an exception
@@ -209,9 +220,9 @@ def test_is_postgres_running_exception(mock_run):
     # Verify subprocess.run was called
     mock_run.assert_called_once()
 
-@patch('run.time.sleep')
-@patch('run.subprocess.Popen')
-@patch('run.subprocess.run')
+@patch('time.sleep')
+@patch('subprocess.Popen')
+@patch('subprocess.run')
 @patch('project_runner.postgres.start_postgres')
 def test_start_postgres_success(mock_postgres_start, mock_run, mock_popen, mock_sleep, reset_processes):
     """Test starting PostgreSQL when it succeeds."""
@@ -229,9 +240,9 @@ def test_start_postgres_success(mock_postgres_start, mock_run, mock_popen, mock_
     # Verify process added to global processes list
     assert mock_process in run.processes
 
-@patch('run.time.sleep')
-@patch('run.subprocess.Popen')
-@patch('run.subprocess.run')
+@patch('time.sleep')
+@patch('subprocess.Popen')
+@patch('subprocess.run')
 def test_start_postgres_failure(mock_run, mock_popen, mock_sleep, reset_processes):
     """Test starting PostgreSQL when it fails."""
     # Setup mock for subprocess.Popen
@@ -242,7 +253,7 @@ def test_start_postgres_failure(mock_run, mock_popen, mock_sleep, reset_processe
     
     # Setup mock for subprocess.run (pg_isready check)
     mock_run_result = MagicMock()
-    mock_run_result.stdout = "localhost:5432 - no response"
+    mock_run_result.stdout = b"localhost:5432 - no response"
     mock_run.return_value = mock_run_result
     
     # Call function
@@ -253,8 +264,8 @@ def test_start_postgres_failure(mock_run, mock_popen, mock_sleep, reset_processe
     # Verify process added to global processes list
     assert mock_process in run.processes
 
-@patch('run.time.sleep')
-@patch('run.subprocess.Popen')
+@patch('time.sleep')
+@patch('subprocess.Popen')
 def test_start_postgres_exception(mock_popen, mock_sleep, reset_processes):
     """Test starting PostgreSQL when an exception occurs."""
     # Setup mock to raise an exception
@@ -266,12 +277,13 @@ def test_start_postgres_exception(mock_popen, mock_sleep, reset_processes):
     # Verify result is False (PostgreSQL failed to start)
     assert result is False
 
-@patch('run.os.path.exists')
-@patch('run.check_port_in_use')
-@patch('run.wait_for_server')
-@patch('run.subprocess.run')
-@patch('run.subprocess.Popen')
-def test_start_frontend_success(mock_popen, mock_run, mock_wait, mock_check_port, mock_exists, reset_processes):
+@patch('os.path.exists')
+@patch('project_runner.servers.check_port_in_use')
+@patch('project_runner.servers.wait_for_server')
+@patch('project_runner.servers.find_npm_path')
+@patch('subprocess.Popen')
+@patch('time.sleep')
+def test_start_frontend_success(mock_sleep, mock_popen, mock_find_npm, mock_wait, mock_check_port, mock_exists, reset_processes):
     """Test starting frontend when it succeeds."""
     # Mock directory exists
     mock_exists.return_value = True
@@ -279,10 +291,11 @@ def test_start_frontend_success(mock_popen, mock_run, mock_wait, mock_check_port
     mock_check_port.return_value = False
     # Mock server becoming available
     mock_wait.return_value = True
-    # Mock subprocess.run for npm path discovery
-    mock_run.return_value = MagicMock(stdout="C:\\path\\to\\npm.cmd")
-    # Mock subprocess
+    # Mock npm path discovery
+    mock_find_npm.return_value = "C:\\path\\to\\npm.cmd"
+    # Mock subprocess that keeps running
     mock_process = MagicMock()
+    mock_process.poll.return_value = None
     mock_popen.return_value = mock_process
     
     # Call function
@@ -290,33 +303,37 @@ def test_start_frontend_success(mock_popen, mock_run, mock_wait, mock_check_port
     
     # Verify result is True (frontend started successfully)
     assert result is True
-    # Verify subprocess.run was called to find npm
-    mock_run.assert_called_once()
+    # Verify npm was looked up
+    mock_find_npm.assert_called_once()
     # Verify subprocess.Popen was called to start frontend
     mock_popen.assert_called_once()
     # Verify process added to global processes list
     assert mock_process in run.processes
 
-@patch('run.os.path.exists')
-@patch('run.subprocess.run')
-def test_start_frontend_npm_not_found(mock_run, mock_exists, reset_processes):
+@patch('os.path.exists')
+@patch('project_runner.servers.find_npm_path')
+def test_start_frontend_npm_not_found(mock_find_npm, mock_exists, reset_processes):
     """Test starting frontend when npm is not found."""
     # Mock directory exists
     mock_exists.return_value = True
     # Mock npm not found
-    mock_run.side_effect = Exception("npm not found")
+    mock_find_npm.return_value = None
     
     # Call function
     result = run.start_frontend()
     
     # Verify result is False (frontend failed to start)
     assert result is False
-    # Verify subprocess.run was called to find npm
-    mock_run.assert_called_once()
+    # Verify npm was looked up
+    mock_find_npm.assert_called_once()
 
-@patch('run.os.path.exists')
-def test_start_frontend_no_frontend_dir(mock_exists, reset_processes):
+@patch('os.path.exists')
+@patch('project_runner.servers.find_npm_path')
+@patch('project_runner.servers.check_port_in_use')
+def test_start_frontend_no_frontend_dir(mock_check_port, mock_find_npm, mock_exists, reset_processes):
     """Test starting frontend when frontend directory doesn't exist."""
+    mock_check_port.return_value = False
+    mock_find_npm.return_value = "npm"
     # Mock directory doesn't exist
     mock_exists.return_value = False
     
@@ -325,69 +342,41 @@ def test_start_frontend_no_frontend_dir(mock_exists, reset_processes):
     
     # Verify result is False (frontend failed to start)
     assert result is False
-    # Verify os.path.exists was called with the correct path
-    mock_exists.assert_called_with(os.path.join(os.path.dirname(os.path.abspath(run.__file__)), 'frontend'))
+    # Verify os.path.exists was called with the frontend directory
+    mock_exists.assert_called_with("frontend")
+    assert run.processes == []
 
 @patch('project_runner.process.clean_up')  # Patch imported process.clean_up
 def test_clean_up(mock_process_clean_up, reset_processes):
-    """Test the clean_up function.
-    
-    This test verifies that:
-    1. Running processes are terminated gracefully
-    2. Already exited processes are not terminated
-    3. Processes that don't terminate gracefully are killed
-    4. The process module's clean_up function is called correctly
-    """
-    # Create some mock processes
+    """Test that clean_up hands the tracked processes to the process module."""
     process1 = MagicMock()
-    # Set up poll to return None first time (running), then 0 (terminated)
-    process1.poll.side_effect = [None, 0, 0, 0]
-    process1.terminate = MagicMock()
-    process1.kill = MagicMock()
-    
     process2 = MagicMock()
-    process2.poll.return_value = 0  # Already exited
-    process2.terminate = MagicMock()
-    process2.kill = MagicMock()
-    
-    # Add processes to global list
     run.processes = [process1, process2]
     
     # Call clean_up
     run.clean_up()
     
-    # Verify process1 was terminated (it was still running)
-    process1.terminate.assert_called_once()
-    # Since process1 responded to terminate, kill should not be called
-    process1.kill.assert_not_called()
-    
-    # Verify process2 was not terminated (it already exited)
-    process2.terminate.assert_not_called()
-    process2.kill.assert_not_called()
-    
     # Verify the imported process.clean_up was called with the processes list
     mock_process_clean_up.assert_called_once_with(run.processes)
+
+@patch('run.is_postgres_running', return_value=False)
+@patch('run.start_postgres')
+@patch('run.start_backend')
+@patch('run.start_frontend', return_value=True)
+@patch('run.start_simulation')
+def test_main_starts_backend_after_postgres(mock_start_sim, mock_start_frontend,
+                                            mock_start_backend, mock_start_postgres,
+                                            mock_is_postgres):
+    """Test that the backend only starts once PostgreSQL has finished starting"""
+    # Both mocks record their calls on one parent, in the order they happen
+    manager = MagicMock()
+    manager.attach_mock(mock_start_postgres, 'start_postgres')
+    manager.attach_mock(mock_start_backend, 'start_backend')
+    mock_start_postgres.return_value = True
+    mock_start_backend.return_value = True
     
-    # Now create a new test with a process that doesn't respond to terminate
-    run.processes = []
-    process3 = MagicMock()
-    # Will always return None - indicating it's never terminating
-    process3.poll.return_value = None
-    process3.terminate = MagicMock()
-    process3.kill = MagicMock()
-    
-    run.processes = [process3]
-    
-    # Reset the process clean_up mock for this second test case
-    mock_process_clean_up.reset_mock()
-    
-    # Call clean_up again
-    with patch('run.time.sleep'):  # Skip sleeps for speed
-        run.clean_up()
-    
-    # Verify process3 was terminated and then killed
-    process3.terminate.assert_called_once()
-    process3.kill.assert_called_once()
+    with patch('sys.argv', ['run.py']):
+        with patch('run.atexit.register'):
+            run.main()
     
-    # Verify the imported process.clean_up was called again
-    mock_process_clean_up.assert_called_once_with(run.processes) 
\ No newline at end of file
+    assert [name for name, _, _ in manager.mock_calls] == ['start_postgres', 'start_backend']